@@ -0,0 +1,160 @@
+import os
+import json
+import uuid
+from datetime import datetime, timezone
+from clients import get_redis
+
+# --- RECRUITER BATCH STATE (REDIS) ---
+# Shared by the API (creates batches, reports progress) and the worker
+# (records one result per item). Layout, all expiring after BATCH_TTL_SECONDS:
+#   batch:{id}          HASH  status, total, completed, failed, duplicates, ...
+#   batch:{id}:items    HASH  item_id -> {filename, github_username, sha256, resume_path}
+#   batch:{id}:results  HASH  item_id -> scores, or {"status": "failed", "error": ...}
+#   batch:{id}:queue    LIST  items not sent to the worker yet (see producer.send_batch)
+
+BATCH_TTL_SECONDS = int(os.environ.get("BATCH_TTL_SECONDS", str(7 * 24 * 3600)))
+BATCH_PREFIX = "batch:"
+# Batches one client IP may submit per window (each item costs two LLM calls)
+BATCH_RATE_WINDOW_SECONDS = int(os.environ.get("BATCH_RATE_WINDOW_SECONDS", "3600"))
+BATCH_MAX_PER_IP = int(os.environ.get("BATCH_MAX_PER_IP", "10"))
+BATCH_RATE_PREFIX = "batch_rl:ip:"
+
+
+def _keys(batch_id: str) -> tuple[str, str, str]:
+    key = f"{BATCH_PREFIX}{batch_id}"
+    return key, f"{key}:items", f"{key}:results"
+
+
+def _queue_key(batch_id: str) -> str:
+    return f"{BATCH_PREFIX}{batch_id}:queue"
+
+
+def take_submission_slot(client_ip: str) -> int | None:
+    """
+    Counts a batch submission against `client_ip`'s fixed window.
+    Returns None if it is allowed, else the milliseconds until the window resets.
+    """
+    key = f"{BATCH_RATE_PREFIX}{client_ip}"
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.set(key, 0, ex=BATCH_RATE_WINDOW_SECONDS, nx=True)
+    pipe.incr(key)
+    pipe.pttl(key)
+    _created, count, ttl_ms = pipe.execute()
+    return None if count <= BATCH_MAX_PER_IP else max(ttl_ms, 0)
+
+
+def new_batch_id() -> str:
+    return uuid.uuid4().hex
+
+
+def create_batch(batch_id: str, recruiter_id: str, items: dict, duplicates: int):
+    """Stores the batch and its items. `items` maps item_id -> item dict."""
+    meta_key, items_key, _results_key = _keys(batch_id)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hset(meta_key, mapping={
+        "status": "processing",
+        "recruiter_id": recruiter_id,
+        "total": len(items),
+        "completed": 0,
+        "failed": 0,
+        "duplicates": duplicates,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+    pipe.hset(items_key, mapping={item_id: json.dumps(item) for item_id, item in items.items()})
+    pipe.expire(meta_key, BATCH_TTL_SECONDS)
+    pipe.expire(items_key, BATCH_TTL_SECONDS)
+    pipe.execute()
+
+
+def _counter(result: dict) -> str:
+    return "failed" if result.get("status") == "failed" else "completed"
+
+
+def record_result(batch_id: str, item_id: str, result: dict):
+    """
+    Stores one item's result and bumps the matching progress counter.
+    Re-recording an item (a dead-letter replay) moves it between counters
+    instead of counting it twice.
+    """
+    meta_key, _items_key, results_key = _keys(batch_id)
+    redis_client = get_redis()
+    previous = redis_client.hget(results_key, item_id)
+    counter = _counter(result)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(results_key, item_id, json.dumps(result))
+    if previous is None:
+        pipe.hincrby(meta_key, counter, 1)
+    elif _counter(json.loads(previous)) != counter:
+        pipe.hincrby(meta_key, _counter(json.loads(previous)), -1)
+        pipe.hincrby(meta_key, counter, 1)
+    pipe.expire(results_key, BATCH_TTL_SECONDS)
+    pipe.execute()
+
+
+def queue_items(batch_id: str, items: dict):
+    """Parks a batch's items until a slot frees up. `items` maps item_id -> (github_username, resume_path)."""
+    key = _queue_key(batch_id)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.rpush(key, *(json.dumps([item_id, *args]) for item_id, args in items.items()))
+    pipe.expire(key, BATCH_TTL_SECONDS)
+    pipe.execute()
+
+
+def pop_next(batch_id: str, count: int = 1) -> list:
+    """Takes up to `count` queued items, as (item_id, github_username, resume_path)."""
+    raw = get_redis().lpop(_queue_key(batch_id), count)
+    return [tuple(json.loads(item)) for item in raw or []]
+
+
+def claim_finalize(batch_id: str) -> bool:
+    """True exactly once: for the caller that sees every item recorded first."""
+    meta_key, _items_key, _results_key = _keys(batch_id)
+    redis_client = get_redis()
+    total, completed, failed = redis_client.hmget(meta_key, "total", "completed", "failed")
+    if total is None or int(completed or 0) + int(failed or 0) < int(total):
+        return False
+    return bool(redis_client.hsetnx(meta_key, "finalized", 1))
+
+
+def mark_complete(batch_id: str):
+    meta_key, _items_key, _results_key = _keys(batch_id)
+    get_redis().hset(meta_key, "status", "complete")
+
+
+def get_batch(batch_id: str) -> dict | None:
+    """Returns aggregate progress plus all results so far (best showoff_score first)."""
+    meta_key, items_key, results_key = _keys(batch_id)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hgetall(meta_key)
+    pipe.hgetall(items_key)
+    pipe.hgetall(results_key)
+    meta, items, results = pipe.execute()
+    if not meta:
+        return None
+
+    total = int(meta["total"])
+    completed = int(meta["completed"])
+    failed = int(meta["failed"])
+    rows = []
+    for item_id, raw_item in items.items():
+        row = {"item_id": item_id, **json.loads(raw_item)}
+        row.pop("resume_path", None)
+        if item_id in results:
+            row.update(json.loads(results[item_id]))
+        else:
+            row["status"] = "pending"
+        rows.append(row)
+    rows.sort(key=lambda r: r.get("showoff_score", -1), reverse=True)
+
+    return {
+        "batch_id": batch_id,
+        "status": meta["status"],
+        "recruiter_id": meta["recruiter_id"],
+        "created_at": meta["created_at"],
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "duplicates": int(meta["duplicates"]),
+        "progress": round((completed + failed) / total, 3) if total else 1.0,
+        "results": rows,
+    }
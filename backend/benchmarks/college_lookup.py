@@ -0,0 +1,85 @@
+"""
+Microbenchmark for college-domain matching.
+
+Builds registries of increasing size (synthetic institutions plus the real
+data/colleges.json) and times CollegeRegistry.match() against a linear
+"endswith" scan over the same domains, for a mix of exact, subdomain and
+unknown addresses. Trie lookups should stay flat as the registry grows.
+
+Run (from backend/):
+    python benchmarks/college_lookup.py
+    python benchmarks/college_lookup.py --sizes 100 1000 10000 --lookups 200000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from college_registry import CollegeRegistry, load_registry
+
+
+def _synthetic_colleges(n: int, rng: random.Random) -> list:
+    tlds = ["ac.in", "edu.in", "edu", "ac.uk", "edu.au"]
+    return [
+        {"name": f"Institute {i}", "domains": [f"inst{i}.{rng.choice(tlds)}"]}
+        for i in range(n)
+    ]
+
+
+def _queries(domains: list, count: int, rng: random.Random) -> list:
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        domain = rng.choice(domains)
+        if kind < 0.4:
+            queries.append(domain) # exact
+        elif kind < 0.8:
+            queries.append(f"{rng.choice(['cse', 'ee', 'mech', 'students'])}.{domain}") # departmental
+        else:
+            queries.append(f"unknown{rng.randrange(10**6)}.edu") # not a college
+    return queries
+
+
+def _linear_match(domains: dict, domain: str):
+    for registered in domains:
+        if domain == registered or domain.endswith("." + registered):
+            return registered
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="College domain lookup microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[13, 1000, 5000, 20000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--linear-lookups", type=int, default=2000,
+                        help="Lookups for the linear baseline (it gets slow)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    real = load_registry()
+    print(f"{'institutions':>12} {'trie ns/lookup':>15} {'linear ns/lookup':>17}")
+
+    for size in args.sizes:
+        colleges = [{"name": name, "domains": [domain]} for domain, name in real.domains.items()]
+        colleges += _synthetic_colleges(max(0, size - len(colleges)), rng)
+        registry = CollegeRegistry(colleges)
+        domains = list(registry.domains)
+
+        queries = _queries(domains, args.lookups, rng)
+        # Sanity check: both strategies agree
+        for query in queries[:500]:
+            assert registry.match(query) == _linear_match(registry.domains, query), query
+
+        match = registry.match
+        trie_s = timeit.timeit(lambda: [match(q) for q in queries], number=1)
+        linear_queries = queries[:args.linear_lookups]
+        linear_s = timeit.timeit(lambda: [_linear_match(registry.domains, q) for q in linear_queries], number=1)
+
+        print(f"{len(domains):>12} {trie_s / len(queries) * 1e9:>15.0f} {linear_s / len(linear_queries) * 1e9:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
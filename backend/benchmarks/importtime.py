@@ -0,0 +1,121 @@
+"""
+Import-time profile for the API (main.py) and the worker (worker.py).
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter a few
+times, keeps the median, and compares it against the cold-start budget in
+importtime_budget.json. Each release's numbers are recorded in
+importtime_history.json so regressions show up release over release.
+
+Run (from backend/):
+    python benchmarks/importtime.py --release v3.2
+    python benchmarks/importtime.py --module main --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BUDGET_FILE = os.path.join(BENCH_DIR, "importtime_budget.json")
+HISTORY_FILE = os.path.join(BENCH_DIR, "importtime_history.json")
+
+# main.py refuses to start without these; the values are never used for I/O.
+PLACEHOLDER_ENV = {
+    "SUPABASE_URL": "http://127.0.0.1:54321",
+    "SUPABASE_KEY": "placeholder.service.key",
+}
+
+
+def _run_once(module: str) -> tuple[float, dict]:
+    """Returns (total_ms, {top_level_package: self_ms}) for one cold import."""
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"'import {module}' failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    per_package = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total_us += int(self_us)
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1000
+    return total_us / 1000, dict(per_package)
+
+
+def profile_module(module: str, runs: int) -> dict:
+    samples = [_run_once(module) for _ in range(runs)]
+    totals = [total for total, _ in samples]
+    median_idx = totals.index(statistics.median_low(totals))
+    return {
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "packages_ms": samples[median_idx][1],
+    }
+
+
+def _load_json(path: str, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile for main.py / worker.py")
+    parser.add_argument("--module", action="append", choices=["main", "worker"],
+                        help="Module(s) to profile (default: both)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to print")
+    parser.add_argument("--release", help="Record results under this release in importtime_history.json")
+    args = parser.parse_args()
+
+    budget = _load_json(BUDGET_FILE, {})
+    modules = args.module or ["main", "worker"]
+    results = {}
+    over_budget = False
+
+    for module in modules:
+        print(f"\n--- Profiling 'import {module}' ({args.runs} runs) ---")
+        result = profile_module(module, args.runs)
+        results[module] = result
+
+        slowest = sorted(result["packages_ms"].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        for package, ms in slowest:
+            print(f"  {package:<30} {ms:8.1f} ms")
+
+        limit = budget.get(module, {}).get("budget_ms")
+        status = ""
+        if limit is not None:
+            ok = result["median_ms"] <= limit
+            over_budget = over_budget or not ok
+            status = f" (budget {limit} ms: {'OK' if ok else 'OVER BUDGET'})"
+        print(f"  > Median: {result['median_ms']} ms  [min {result['min_ms']}, max {result['max_ms']}]{status}")
+
+    if args.release:
+        history = _load_json(HISTORY_FILE, {})
+        history[args.release] = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            **{module: {k: v for k, v in r.items() if k != "packages_ms"} for module, r in results.items()},
+        }
+        with open(HISTORY_FILE, "w") as f:
+            json.dump(history, f, indent=2, sort_keys=True)
+        print(f"\nRecorded results for release '{args.release}' in {os.path.relpath(HISTORY_FILE)}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
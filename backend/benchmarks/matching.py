@@ -0,0 +1,84 @@
+"""
+Microbenchmark for the job-matching index.
+
+Fills a FeatureIndex with synthetic candidates (random scores, a few
+languages and skills each, drawn from the real vocabulary in features.py),
+then times FeatureIndex.search() for a handful of job postings, with and
+without a showoff_score floor and with the opt-in filter (half the
+profiles opted in). Search should stay in single-digit milliseconds at 100k
+profiles.
+
+Run (from backend/):
+    python benchmarks/matching.py
+    python benchmarks/matching.py --profiles 10000 100000 500000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features import LANGUAGES, SKILLS
+from matching import FeatureIndex, MatchQuery
+
+POSTINGS = [
+    {"title": "Senior React Developer", "skills": ["React", "TypeScript", "Node.js", "AWS"], "languages": []},
+    {"title": "Full-Stack Engineer (Python/Django)", "skills": ["Python", "Django", "PostgreSQL", "Docker", "REST APIs"], "languages": []},
+    {"title": "ML Engineer (Computer Vision)", "skills": ["Python", "TensorFlow", "PyTorch", "Computer Vision", "OpenCV"], "languages": []},
+    {"title": "DevOps Engineer (Kubernetes)", "skills": ["Kubernetes", "Docker", "Terraform", "AWS", "CI/CD", "Prometheus"], "languages": ["go"]},
+]
+
+
+def _synthetic_features(rng: random.Random) -> dict:
+    resume, github = rng.uniform(20, 100), rng.uniform(10, 100)
+    languages = rng.sample(LANGUAGES, rng.randint(1, 4))
+    shares = [rng.random() for _ in languages]
+    return {
+        "scores": {"resume": resume, "github": github, "showoff": resume * 0.7 + github * 0.3},
+        "languages": {language: share / sum(shares) for language, share in zip(languages, shares)},
+        "skills": {skill: rng.choice([0.5, 1.0]) for skill in rng.sample(SKILLS, rng.randint(2, 10))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job-matching index microbenchmark")
+    parser.add_argument("--profiles", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200, help="Searches per (size, posting)")
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    queries = [MatchQuery(p["skills"], p["languages"], title=p["title"]) for p in POSTINGS]
+    print(f"{'profiles':>9} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'floor 70 p50 ms':>16} {'opt-in p50 ms':>14}")
+
+    for size in args.profiles:
+        index = FeatureIndex()
+        start = time.perf_counter()
+        for n in range(size):
+            index.upsert(f"user-{n}", _synthetic_features(rng))
+        index.set_opted_in({f"user-{n}" for n in range(0, size, 2)})
+        load_s = time.perf_counter() - start
+
+        timings, floored, opted_in = [], [], []
+        for query in queries:
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                index.search(query, args.top_k)
+                timings.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                index.search(query, args.top_k, min_showoff_score=70)
+                floored.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                index.search(query, args.top_k, opted_in_only=True)
+                opted_in.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{size:>9} {load_s:>8.2f} {statistics.median(timings):>8.2f} {p95:>8.2f} {statistics.median(floored):>16.2f} {statistics.median(opted_in):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
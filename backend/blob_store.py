@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import time
+import hashlib
+from datetime import datetime, timedelta, timezone
+from clients import get_redis, get_supabase
+from dead_letters import DLQ_STREAM
+
+# --- CONTENT-ADDRESSED RESUME STORE ---
+# Resumes are stored once per content hash in the "resumes" bucket at
+#   blobs/{sha[:2]}/{sha}.pdf
+# and each profile points at its current one (profiles.resume_blob_sha256,
+# see migrations/002_resume_blobs.sql). Uploading a PDF we already hold is a
+# no-op, and because the path carries the hash the worker can look a resume
+# up in score_history without downloading it first.
+#
+# Blobs nobody references any more are pruned by collect_garbage() (the
+# "gc_resume_blobs" beat task). A blob is referenced by a profile pointer, by
+# the latest score_history rows (needed to re-score), by a live recruiter
+# batch or by a dead-lettered job. Blobs stored or re-submitted within the
+# last BLOB_GC_GRACE_DAYS are never pruned, which covers uploads whose
+# pointer is not written yet, and neither are blobs being uploaded right now
+# (an in-flight marker, set until the upload is recorded). Each deletion is
+# re-checked against both in one Lua script right before the blob is removed,
+# and a put_blob() racing a deletion waits for it to finish, then re-uploads.
+
+BUCKET = "resumes"
+BLOB_PREFIX = "blobs"
+# ZSET: hash -> last time it was put. Membership means "already in storage".
+BLOB_LAST_USED_KEY = "resume_blobs:last_used"
+# STRING per hash while put_blob() uploads it (not "stored" yet, but keep it)
+BLOB_INFLIGHT_PREFIX = "resume_blobs:inflight:"
+BLOB_INFLIGHT_SECONDS = 300
+# SET of hashes GC has claimed and is removing from storage right now
+BLOB_DELETING_KEY = "resume_blobs:deleting"
+BLOB_DELETE_WAIT_SECONDS = 30
+BLOB_GC_LOCK_KEY = "resume_blobs:gc_lock"
+BLOB_GC_GRACE_DAYS = float(os.environ.get("BLOB_GC_GRACE_DAYS", "7"))
+BLOB_GC_PAGE_SIZE = 1000
+
+# Claims the hashes (ARGV[4:]) that are still unused since ARGV[1] and not
+# being uploaded: forgets them and marks them as being deleted.
+# Returns the claimed hashes; only those may be removed from storage.
+_CLAIM_FOR_DELETION_LUA = """
+local claimed = {}
+for i = 4, #ARGV do
+    local sha = ARGV[i]
+    local last_used = redis.call('ZSCORE', KEYS[1], sha)
+    if (not last_used or tonumber(last_used) < tonumber(ARGV[1]))
+            and redis.call('EXISTS', ARGV[2] .. sha) == 0 then
+        redis.call('ZREM', KEYS[1], sha)
+        redis.call('SADD', KEYS[2], sha)
+        claimed[#claimed + 1] = sha
+    end
+end
+if #claimed > 0 then
+    redis.call('EXPIRE', KEYS[2], tonumber(ARGV[3]))
+end
+return claimed
+"""
+
+_BLOB_PATH_RE = re.compile(rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.pdf$")
+
+
+def blob_path(sha256: str) -> str:
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}.pdf"
+
+
+def sha_from_path(path: str) -> str | None:
+    """The content hash of a blob path, or None for legacy `{user_id}/{filename}` paths."""
+    match = _BLOB_PATH_RE.match(path or "")
+    return match.group(1) if match else None
+
+
+def _is_duplicate_error(e: Exception) -> bool:
+    message = str(e).lower()
+    return "duplicate" in message or "already exists" in message or "409" in message
+
+
+def put_blob(pdf_bytes: bytes) -> tuple[str, str]:
+    """
+    Stores `pdf_bytes` unless a blob with the same hash already exists.
+    Blocking: run it in a threadpool from async code. Returns (sha256, path).
+    """
+    sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+    path = blob_path(sha256)
+    redis_client = get_redis()
+    inflight_key = f"{BLOB_INFLIGHT_PREFIX}{sha256}"
+    if redis_client:
+        # Known blob: bump its last-used time (xx: existing members only) so GC keeps it
+        if redis_client.zadd(BLOB_LAST_USED_KEY, {sha256: time.time()}, xx=True, ch=True):
+            print(f"--- [Blobs] Already stored, upload skipped: {path} ---")
+            return sha256, path
+        # Unknown: only recorded as stored once the upload succeeds
+        redis_client.set(inflight_key, 1, ex=BLOB_INFLIGHT_SECONDS)
+        _wait_for_deletion(redis_client, sha256)
+
+    try:
+        # upsert off: an existing blob is, by construction, identical
+        get_supabase().storage.from_(BUCKET).upload(
+            path=path,
+            file=pdf_bytes,
+            file_options={"content-type": "application/pdf", "upsert": "false"}
+        )
+        print(f"--- [Blobs] Stored: {path} ---")
+    except Exception as e:
+        if not _is_duplicate_error(e):
+            if redis_client:
+                redis_client.delete(inflight_key)
+            raise
+        print(f"--- [Blobs] Already stored: {path} ---")
+
+    if redis_client:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zadd(BLOB_LAST_USED_KEY, {sha256: time.time()})
+        pipe.delete(inflight_key)
+        pipe.execute()
+    return sha256, path
+
+
+def _wait_for_deletion(redis_client, sha256: str):
+    """If GC is removing this blob right now, waits until it is gone so the upload re-creates it."""
+    deadline = time.monotonic() + BLOB_DELETE_WAIT_SECONDS
+    while redis_client.sismember(BLOB_DELETING_KEY, sha256) and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+
+def set_resume_pointer(user_id: str, sha256: str, filename: str, extra_fields: dict | None = None):
+    """Points the user's profile at their current resume blob (plus `extra_fields`, same write)."""
+    get_supabase().from_("profiles").update({
+        "resume_blob_sha256": sha256,
+        "resume_filename": filename,
+        **(extra_fields or {}),
+    }).eq("user_id", user_id).execute()
+
+
+def current_resume_paths(user_ids: list, chunk_size: int = 200) -> dict:
+    """user_id -> blob path of the resume their profile points at now (users without a pointer are left out)."""
+    supabase = get_supabase()
+    paths = {}
+    for i in range(0, len(user_ids), chunk_size): # ids go in the URL
+        response = supabase.from_("profiles").select("user_id, resume_blob_sha256") \
+            .in_("user_id", user_ids[i:i + chunk_size]).not_.is_("resume_blob_sha256", "null").execute()
+        for profile in response.data or []:
+            paths[profile["user_id"]] = blob_path(profile["resume_blob_sha256"])
+    return paths
+
+
+# --- GARBAGE COLLECTION ---
+def _referenced_hashes() -> set:
+    supabase = get_supabase()
+    referenced = set()
+
+    def page_through(table: str, columns: str, column: str, order_by: tuple, extract):
+        # Pages must be ordered by a unique key: without ORDER BY, OFFSET can
+        # skip rows, and a skipped pointer would get a live blob deleted
+        start = 0
+        while True:
+            query = supabase.from_(table).select(columns).not_.is_(column, "null")
+            for key in order_by:
+                query = query.order(key)
+            response = query.range(start, start + BLOB_GC_PAGE_SIZE - 1).execute()
+            page = response.data or []
+            for row in page:
+                sha = extract(row)
+                if sha:
+                    referenced.add(sha)
+            if len(page) < BLOB_GC_PAGE_SIZE:
+                break
+            start += BLOB_GC_PAGE_SIZE
+
+    page_through("profiles", "resume_blob_sha256", "resume_blob_sha256", ("user_id",), lambda r: r["resume_blob_sha256"])
+    page_through("latest_scores", "resume_path", "resume_path", ("user_id", "component"), lambda r: sha_from_path(r["resume_path"]))
+
+    # Live recruiter batches and parked jobs (both in Redis)
+    redis_client = get_redis()
+    for key in redis_client.scan_iter(match="batch:*:items", count=500):
+        for item in redis_client.hvals(key):
+            referenced.add(sha_from_path(json.loads(item).get("resume_path")))
+    for _entry_id, data in redis_client.xrange(DLQ_STREAM):
+        for arg in json.loads(data.get("args", "[]")):
+            if isinstance(arg, str):
+                referenced.add(sha_from_path(arg))
+
+    referenced.discard(None)
+    return referenced
+
+
+def _stored_blobs():
+    """Yields (sha256, created_at) for every blob in the bucket."""
+    bucket = get_supabase().storage.from_(BUCKET)
+    for folder in bucket.list(BLOB_PREFIX, {"limit": 1000}):
+        offset = 0
+        while True:
+            objects = bucket.list(f"{BLOB_PREFIX}/{folder['name']}", {"limit": BLOB_GC_PAGE_SIZE, "offset": offset})
+            for obj in objects:
+                sha = sha_from_path(f"{BLOB_PREFIX}/{folder['name']}/{obj['name']}")
+                if sha:
+                    yield sha, obj.get("created_at")
+            if len(objects) < BLOB_GC_PAGE_SIZE:
+                break
+            offset += BLOB_GC_PAGE_SIZE
+
+
+def collect_garbage(dry_run: bool = False) -> dict:
+    """
+    Deletes unreferenced blobs older than the grace period. Returns counts.
+    Only one collection runs at a time; a concurrent call returns {"skipped": True}.
+    """
+    redis_client = get_redis()
+    lock = redis_client.lock(BLOB_GC_LOCK_KEY, timeout=3600)
+    if not lock.acquire(blocking=False):
+        print("--- [Blobs] GC already running elsewhere, skipped ---")
+        return {"skipped": True}
+    try:
+        return _collect_garbage(redis_client, dry_run)
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+
+def _collect_garbage(redis_client, dry_run: bool) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=BLOB_GC_GRACE_DAYS)
+    referenced = _referenced_hashes()
+    recently_used = set(redis_client.zrangebyscore(BLOB_LAST_USED_KEY, cutoff.timestamp(), "+inf"))
+
+    stored = 0
+    doomed = []
+    for sha, created_at in _stored_blobs():
+        stored += 1
+        if sha in referenced or sha in recently_used:
+            continue
+        try:
+            created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except (AttributeError, ValueError):
+            continue # Unknown age: keep it
+        if created < cutoff:
+            doomed.append(sha)
+
+    deleted = 0
+    if doomed and not dry_run:
+        bucket = get_supabase().storage.from_(BUCKET)
+        claim = redis_client.register_script(_CLAIM_FOR_DELETION_LUA)
+        for i in range(0, len(doomed), BLOB_GC_PAGE_SIZE):
+            # Re-checked right before removal: put_blob() may have used one since the scan
+            claimed = claim(
+                keys=[BLOB_LAST_USED_KEY, BLOB_DELETING_KEY],
+                args=[cutoff.timestamp(), BLOB_INFLIGHT_PREFIX, BLOB_DELETE_WAIT_SECONDS * 2, *doomed[i:i + BLOB_GC_PAGE_SIZE]],
+            )
+            if not claimed:
+                continue
+            try:
+                bucket.remove([blob_path(sha) for sha in claimed])
+                deleted += len(claimed)
+            finally:
+                redis_client.srem(BLOB_DELETING_KEY, *claimed)
+
+    action = "Would delete" if dry_run else "Deleted"
+    print(f"--- [Blobs] GC: {stored} stored, {len(referenced)} referenced, {action} {len(doomed) if dry_run else deleted} ---")
+    return {"stored": stored, "referenced": len(referenced), "deleted": deleted, "unreferenced": len(doomed)}
@@ -0,0 +1,49 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# --- 1. CONFIGURATION ---
+# Shared by the API (main.py) and the worker (worker.py).
+# Nothing heavy is imported here: every client (and its SDK) is only
+# built the first time its accessor is called, so a cold start only pays
+# for the clients a process actually touches.
+load_dotenv() # This loads the .env file
+
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL and REDIS_URL.startswith("rediss://"):
+    REDIS_URL = f"{REDIS_URL}?ssl_cert_reqs=none"
+SUPABASE_URL = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY") # This MUST be your Service Role Key
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+
+# --- 2. LAZY CLIENT ACCESSORS ---
+@lru_cache(maxsize=None)
+def get_supabase():
+    """
+    Returns the process-wide Supabase client (Service Key).
+    The supabase SDK is imported on first use.
+    """
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """
+    Returns the process-wide Redis client, or None if REDIS_URL is not set.
+    """
+    if not REDIS_URL:
+        return None
+    import redis
+    return redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+
+@lru_cache(maxsize=None)
+def get_genai_client():
+    """
+    Returns the process-wide Gemini client.
+    google-genai is by far our slowest import, so only the worker pays for it.
+    """
+    from google import genai
+    return genai.Client(api_key=GEMINI_API_KEY, http_options={"api_version": "v1alpha"})
@@ -0,0 +1,79 @@
+import os
+import json
+from functools import lru_cache
+
+# --- COLLEGE REGISTRY ---
+# Single source of truth: data/colleges.json (a list of {name, domains}).
+# The frontend's constants/collegeDomains.js is generated from the same file
+# by scripts/generate_college_domains.py.
+#
+# Domains are stored in a trie of *reversed* labels
+# ("cse.iitb.ac.in" -> in / ac / iitb / cse). A lookup walks at most as many
+# nodes as the email domain has labels, so it costs the same for 10 or 10,000
+# institutions, and it matches any subdomain of a registered domain
+# (departmental addresses) but never a look-alike ("fakeiitb.ac.in").
+
+COLLEGE_REGISTRY_PATH = os.environ.get(
+    "COLLEGE_REGISTRY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "colleges.json")
+)
+
+_DOMAIN = "" # Trie key holding the registered domain (labels are never empty)
+
+
+def _labels(domain: str) -> list:
+    return [label for label in domain.strip().strip(".").lower().split(".") if label]
+
+
+class CollegeRegistry:
+    def __init__(self, colleges: list):
+        self._root = {}
+        self.domains = {} # registered domain -> college name
+        for college in colleges:
+            for domain in college["domains"]:
+                self.add(domain, college["name"])
+
+    def add(self, domain: str, college_name: str):
+        labels = _labels(domain)
+        if not labels:
+            raise ValueError(f"Invalid college domain: '{domain}'")
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        registered = ".".join(labels)
+        node[_DOMAIN] = registered
+        self.domains[registered] = college_name
+
+    def match(self, domain: str) -> str | None:
+        """
+        Returns the registered domain that `domain` is, or is a subdomain of
+        (the most specific one wins), else None. `self.domains[...]` of it is
+        the college name.
+        """
+        node = self._root
+        registered = None
+        for label in reversed(_labels(domain)):
+            node = node.get(label)
+            if node is None:
+                break
+            registered = node.get(_DOMAIN, registered)
+        return registered
+
+    def match_email(self, email: str) -> str | None:
+        """The registered domain of `email` (see match()), else None."""
+        if "@" not in email:
+            return None
+        return self.match(email.rsplit("@", 1)[1])
+
+
+def load_registry(path: str = COLLEGE_REGISTRY_PATH) -> CollegeRegistry:
+    with open(path, "r", encoding="utf-8") as f:
+        return CollegeRegistry(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def get_registry() -> CollegeRegistry:
+    """The process-wide registry, loaded once (the API warms it at startup)."""
+    registry = load_registry()
+    print(f"--- [Colleges] Loaded {len(registry.domains)} college domains ---")
+    return registry
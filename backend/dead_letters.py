@@ -0,0 +1,102 @@
+import os
+import json
+from datetime import datetime, timezone
+from clients import get_redis
+
+# --- FAILED-PHASE HANDLING: RETRY POLICY + DEAD-LETTER STREAM ---
+# A job phase that fails raises AnalysisError(phase, failure_class). The task
+# keeps every phase that did succeed (the resume score is still written and
+# recorded in score_history), then either retries (per RETRY_POLICY) or, once
+# retries are exhausted, parks the job with its inputs in the `analysis_dlq`
+# Redis stream. scripts/replay_dead_letters.py re-queues parked jobs; a replay
+# reuses the recorded successful branches instead of paying for them again.
+
+DLQ_STREAM = "analysis_dlq"
+DLQ_MAXLEN = int(os.environ.get("DLQ_MAXLEN", "10000"))
+
+TRANSIENT = "transient" # network errors, timeouts, 429/5xx
+LLM_OUTPUT = "llm_output" # the LLM answered, but not with usable JSON
+PERMANENT = "permanent" # bad input (unknown GitHub user, missing file, 4xx)
+
+# max_retries and base countdown (seconds, doubled per attempt) per class
+RETRY_POLICY = {
+    TRANSIENT: {"max_retries": int(os.environ.get("RETRY_TRANSIENT_MAX", "3")), "countdown": 30},
+    LLM_OUTPUT: {"max_retries": int(os.environ.get("RETRY_LLM_OUTPUT_MAX", "2")), "countdown": 10},
+    PERMANENT: {"max_retries": 0, "countdown": 0},
+}
+
+
+class AnalysisError(Exception):
+    """A failed job phase (e.g. "gemini.resume") and how it failed."""
+    def __init__(self, phase: str, failure_class: str, message: str):
+        super().__init__(message)
+        self.phase = phase
+        self.failure_class = failure_class
+
+    def as_dict(self) -> dict:
+        return {"phase": self.phase, "failure_class": self.failure_class, "error": str(self)}
+
+
+def classify(exc: Exception) -> str:
+    """Maps an exception from httpx / google-genai / storage to a failure class."""
+    if isinstance(exc, AnalysisError):
+        return exc.failure_class
+    if isinstance(exc, (json.JSONDecodeError, ValueError)):
+        return LLM_OUTPUT
+    # google-genai's APIError carries .code; httpx / storage errors carry .status_code
+    status = getattr(exc, "code", None) or getattr(exc, "status_code", None) \
+        or getattr(getattr(exc, "response", None), "status_code", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return TRANSIENT # Connection errors, timeouts, anything without a status
+    if status == 429 or status >= 500:
+        return TRANSIENT
+    return PERMANENT
+
+
+def retry_countdown(failures: list, retries_done: int) -> int | None:
+    """
+    Seconds to wait before retrying the job, or None if no failed phase may
+    be retried again. The most patient policy among the failures wins.
+    """
+    countdowns = [
+        RETRY_POLICY[f.failure_class]["countdown"] * (2 ** retries_done)
+        for f in failures
+        if retries_done < RETRY_POLICY[f.failure_class]["max_retries"]
+    ]
+    return max(countdowns) if countdowns else None
+
+
+def dead_letter(task: str, args: list, failures: list, attempts: int, partial: dict) -> str:
+    """Parks a failed job with its inputs, failed phases and successful partial results."""
+    entry_id = get_redis().xadd(DLQ_STREAM, {
+        "task": task,
+        "args": json.dumps(args),
+        "phases": ",".join(f.phase for f in failures),
+        "failure_classes": ",".join(sorted({f.failure_class for f in failures})),
+        "failures": json.dumps([f.as_dict() for f in failures]),
+        "attempts": attempts,
+        "partial": json.dumps(partial),
+        "failed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }, maxlen=DLQ_MAXLEN, approximate=True)
+    print(f"--- [DLQ] Parked {task} {args[:2]} ({', '.join(f.phase for f in failures)}) as {entry_id} ---")
+    return entry_id
+
+
+def list_dead_letters(count: int = 100, start: str = "-") -> list:
+    """Oldest first. Each entry is (entry_id, decoded fields)."""
+    entries = get_redis().xrange(DLQ_STREAM, min=start, count=count)
+    return [
+        (entry_id, {
+            **data,
+            "args": json.loads(data["args"]),
+            "failures": json.loads(data["failures"]),
+            "partial": json.loads(data["partial"]),
+        })
+        for entry_id, data in entries
+    ]
+
+
+def remove_dead_letter(entry_id: str):
+    get_redis().xdel(DLQ_STREAM, entry_id)
@@ -1,62 +1,245 @@
-import asyncio
+import os
+import sys
 import json
-import fitz # PyMuPDF
-from fastapi.concurrency import run_in_threadpool
+import time
+import asyncio
+import hashlib
+import argparse
+import statistics
+
+# We must import the *exact* scoring path our worker uses
+from worker import score_resume_with_llm_sync, GEMINI_MODEL, RESUME_RUBRIC_VERSION
+
+# --- CONFIGURATION ---
+GOLDEN_SET_PATH = "golden_set_resume.json"
+CACHE_DIR = ".eval_cache"
+# USD per 1M tokens (thinking tokens are billed as output). Override per model.
+PRICE_INPUT_PER_M = float(os.environ.get("EVAL_PRICE_INPUT_PER_M", "2.00"))
+PRICE_OUTPUT_PER_M = float(os.environ.get("EVAL_PRICE_OUTPUT_PER_M", "12.00"))
+
+
+# --- 1. RESULT CACHE ---
+# One file per (resume bytes, prompt, model, repeat index). Re-running the
+# harness only pays for runs it has not seen; changing the prompt or model
+# changes the key, so stale results are never reused.
+def _cache_key(file_hash: str, run_index: int) -> str:
+    raw = f"{file_hash}|{RESUME_RUBRIC_VERSION}|{GEMINI_MODEL}|{run_index}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_read(key: str) -> dict | None:
+    try:
+        with open(os.path.join(CACHE_DIR, f"{key}.json"), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _cache_write(key: str, record: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{key}.json"), "w") as f:
+        json.dump(record, f)
+
+
+# --- 2. ONE SCORING RUN ---
+async def _score_run(semaphore: asyncio.Semaphore, resume_file: str, pdf_bytes: bytes,
+                     file_hash: str, run_index: int, use_cache: bool) -> dict:
+    key = _cache_key(file_hash, run_index)
+    if use_cache:
+        cached = _cache_read(key)
+        if cached:
+            return {**cached, "cached": True}
+
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            # Same blocking call the worker makes, run off the event loop
+            result, error = await asyncio.to_thread(score_resume_with_llm_sync, pdf_bytes), None
+        except Exception as e:
+            result, error = {}, str(e)
+        latency = time.perf_counter() - start
+
+    record = {
+        "resume_file": resume_file,
+        "run": run_index,
+        "score": result.get("total_score_100", 0),
+        "error": error,
+        "latency_seconds": round(latency, 2),
+        "usage": result.get("usage", {}),
+    }
+    if use_cache and not record["error"]:
+        _cache_write(key, record)
+    return {**record, "cached": False}
+
+
+# --- 3. METRICS ---
+def _ranks(values: list) -> list:
+    """Average ranks (ties share the mean of their positions)."""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
 
-# We must import the *exact* functions we use in our server
-from main import score_resume_sync
 
-async def run_evaluation():
-    print("--- Starting Resume Evals Harness (v1.5 vs LLM Panel) ---")
-    
+def spearman(xs: list, ys: list) -> float | None:
+    if len(xs) < 2:
+        return None
+    rx, ry = _ranks(xs), _ranks(ys)
+    mx, my = statistics.fmean(rx), statistics.fmean(ry)
+    cov = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    norm = (sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry)) ** 0.5
+    return cov / norm if norm else None
+
+
+def _cost(usage: dict) -> float:
+    output = usage.get("output_tokens", 0) + usage.get("thinking_tokens", 0)
+    return usage.get("prompt_tokens", 0) / 1e6 * PRICE_INPUT_PER_M + output / 1e6 * PRICE_OUTPUT_PER_M
+
+
+def summarize(golden_set: list, records: list, runs: int, wall_seconds: float) -> dict:
+    by_file = {}
+    for record in records:
+        by_file.setdefault(record["resume_file"], []).append(record)
+
+    per_resume = []
+    for entry in golden_set:
+        ok = [r for r in by_file.get(entry["resume_file"], []) if not r["error"]]
+        scores = [r["score"] for r in ok]
+        row = {
+            "resume_file": entry["resume_file"],
+            "golden": entry["llm_avg_score"],
+            "runs_ok": len(ok),
+            "mean": statistics.fmean(scores) if scores else None,
+            "stdev": statistics.stdev(scores) if len(scores) > 1 else 0.0,
+            "variance": statistics.variance(scores) if len(scores) > 1 else 0.0,
+            "min": min(scores) if scores else None,
+            "max": max(scores) if scores else None,
+        }
+        row["error"] = None if row["mean"] is None else row["mean"] - row["golden"]
+        per_resume.append(row)
+
+    scored = [r for r in per_resume if r["mean"] is not None]
+    # MAE of each individual repeat, to show how much one run can be trusted
+    per_run_mae = []
+    for run_index in range(runs):
+        diffs = [abs(r["score"] - golden["llm_avg_score"])
+                 for golden in golden_set
+                 for r in by_file.get(golden["resume_file"], [])
+                 if r["run"] == run_index and not r["error"]]
+        if diffs:
+            per_run_mae.append(statistics.fmean(diffs))
+
+    fresh = [r for r in records if not r["cached"] and not r["error"]]
+    latencies = sorted(r["latency_seconds"] for r in fresh)
+    usage_totals = {k: sum(r["usage"].get(k, 0) for r in fresh) for k in ("prompt_tokens", "output_tokens", "thinking_tokens")}
+
+    return {
+        "model": GEMINI_MODEL,
+        "rubric_version": RESUME_RUBRIC_VERSION,
+        "runs_per_resume": runs,
+        "resumes_scored": len(scored),
+        "failed_runs": sum(1 for r in records if r["error"]),
+        "mae": statistics.fmean(abs(r["error"]) for r in scored) if scored else None,
+        "mean_bias": statistics.fmean(r["error"] for r in scored) if scored else None,
+        "per_run_mae": per_run_mae,
+        "mean_within_resume_variance": statistics.fmean(r["variance"] for r in scored) if scored else None,
+        "mean_within_resume_stdev": statistics.fmean(r["stdev"] for r in scored) if scored else None,
+        "spearman_rho": spearman([r["mean"] for r in scored], [r["golden"] for r in scored]),
+        "wall_clock_seconds": round(wall_seconds, 2),
+        "llm_calls": len(fresh),
+        "cached_runs": sum(1 for r in records if r["cached"]),
+        "latency_p50_seconds": statistics.median(latencies) if latencies else None,
+        "latency_max_seconds": latencies[-1] if latencies else None,
+        "tokens": usage_totals,
+        "cost_usd": round(sum(_cost(r["usage"]) for r in fresh), 4),
+        "per_resume": per_resume,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'Resume':<52} {'Golden':>7} {'Mean':>7} {'Std':>6} {'Range':>13} {'Diff':>7}")
+    for r in report["per_resume"]:
+        if r["mean"] is None:
+            print(f"{r['resume_file']:<52} {r['golden']:>7.1f}   (all runs failed)")
+            continue
+        span = f"{r['min']:.0f}-{r['max']:.0f}"
+        print(f"{r['resume_file']:<52} {r['golden']:>7.1f} {r['mean']:>7.1f} {r['stdev']:>6.2f} {span:>13} {r['error']:>+7.2f}")
+
+    def fmt(value, spec=".2f"):
+        return "n/a" if value is None else format(value, spec)
+
+    print(f"\n--- COMPLETE ({report['model']}, {report['rubric_version']}) ---")
+    print(f"Resumes scored:          {report['resumes_scored']} x {report['runs_per_resume']} runs ({report['failed_runs']} failed runs)")
+    print(f"Mean Absolute Error:     {fmt(report['mae'])} points (bias {fmt(report['mean_bias'], '+.2f')})")
+    print(f"Per-run MAE:             {', '.join(f'{m:.2f}' for m in report['per_run_mae']) or 'n/a'}")
+    print(f"Run-to-run variance:     {fmt(report['mean_within_resume_variance'])} (mean stdev {fmt(report['mean_within_resume_stdev'])})")
+    print(f"Spearman rank corr:      {fmt(report['spearman_rho'], '.3f')}")
+    print(f"Wall clock:              {report['wall_clock_seconds']}s for {report['llm_calls']} LLM calls ({report['cached_runs']} cached)")
+    print(f"Latency p50 / max:       {fmt(report['latency_p50_seconds'])}s / {fmt(report['latency_max_seconds'])}s")
+    tokens = report["tokens"]
+    print(f"Tokens (in/out/think):   {tokens['prompt_tokens']} / {tokens['output_tokens']} / {tokens['thinking_tokens']}")
+    print(f"Estimated cost:          ${report['cost_usd']:.4f}")
+
+
+# --- 4. HARNESS ---
+async def run_evaluation(runs: int, concurrency: int, use_cache: bool, report_path: str | None):
+    print(f"--- Starting Resume Evals Harness ({GEMINI_MODEL} vs LLM Panel, {runs} runs, concurrency {concurrency}) ---")
+
     try:
-        with open('golden_set_resume.json', 'r') as f:
+        with open(GOLDEN_SET_PATH, 'r') as f:
             golden_set = json.load(f)
     except FileNotFoundError:
-        print("ERROR: golden_set_resume.json not found.")
+        print(f"ERROR: {GOLDEN_SET_PATH} not found.")
         return
     except json.JSONDecodeError:
-        print("ERROR: golden_set_resume.json is not valid JSON.")
+        print(f"ERROR: {GOLDEN_SET_PATH} is not valid JSON.")
         return
 
     if not golden_set:
         print("Evals set is empty. Exiting.")
         return
-        
-    total_difference = 0
-    
+
+    semaphore = asyncio.Semaphore(concurrency)
+    runs_to_do = []
     for entry in golden_set:
-        print(f"\nEvaluating: {entry['resume_file']}...")
-        
         try:
-            # 1. Read the resume file (as bytes)
-            with fitz.open(entry['resume_file']) as doc:
-                pdf_bytes = doc.convert_to_pdf()
-            
-            # 2. Run our v1.5 Heuristic Engine
-            # We must use run_in_threadpool to be identical to our server
-            heuristic_score = await run_in_threadpool(score_resume_sync, pdf_bytes)
-            
-            # 3. Get the "Ground Truth"
-            llm_score = entry['llm_avg_score']
-            
-            # 4. Compare Scores
-            difference = heuristic_score - llm_score
-            total_difference += abs(difference)
-            
-            print(f"  > LLM Panel Score (Golden): {llm_score}")
-            print(f"  > Our v1.5 Score (Heuristic): {heuristic_score}")
-            print(f"  > Difference:  {difference:+.2f}")
+            # The worker sends the stored PDF bytes as-is, so do we
+            with open(entry['resume_file'], 'rb') as f:
+                pdf_bytes = f.read()
+        except OSError as e:
+            print(f"  > ERROR reading {entry['resume_file']}: {e}")
+            continue
+        file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        for run_index in range(runs):
+            runs_to_do.append(_score_run(semaphore, entry['resume_file'], pdf_bytes, file_hash, run_index, use_cache))
 
-        except Exception as e:
-            print(f"  > ERROR processing file {entry['resume_file']}: {e}")
+    start = time.perf_counter()
+    records = await asyncio.gather(*runs_to_do)
+    wall_seconds = time.perf_counter() - start
+
+    report = summarize(golden_set, records, runs, wall_seconds)
+    print_report(report)
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump({**report, "records": records}, f, indent=2)
+        print(f"Report written to {report_path}")
 
-    # 5. Get the average error
-    mean_absolute_error = total_difference / len(golden_set)
-    print(f"\n--- COMPLETE ---")
-    print(f"Mean Absolute Error (v1.5 vs LLM Panel): {mean_absolute_error:.2f} points")
 
 if __name__ == "__main__":
-    # Activate venv: .\venv\Scripts\activate
-    # Run: python evaluate_resume.py
-    asyncio.run(run_evaluation())
\ No newline at end of file
+    # Run (from backend/): python evaluate_resume.py --runs 3 --concurrency 4
+    parser = argparse.ArgumentParser(description="Golden-set evaluator for the resume rubric")
+    parser.add_argument("--runs", type=int, default=3, help="Repeats per resume (for variance)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max concurrent Gemini calls")
+    parser.add_argument("--no-cache", action="store_true", help=f"Ignore and don't write {CACHE_DIR}/")
+    parser.add_argument("--report", help="Write the full JSON report here")
+    args = parser.parse_args()
+    if args.runs < 1 or args.concurrency < 1:
+        sys.exit("--runs and --concurrency must be >= 1")
+    asyncio.run(run_evaluation(args.runs, args.concurrency, not args.no_cache, args.report))
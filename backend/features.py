@@ -0,0 +1,187 @@
+import os
+import re
+import json
+from collections import Counter
+from clients import get_redis
+
+# --- CANDIDATE FEATURES FOR JOB MATCHING ---
+# After a complete analysis the worker reduces a candidate to a compact,
+# JSON-serializable feature set over a fixed vocabulary:
+#   {"scores":    {"resume": 0-100, "github": 0-100, "showoff": 0-100},
+#    "languages": {language: share of their analyzed code, 0-1},
+#    "skills":    {skill: 1.0 seen in their code / repo layout, 0.5 only mentioned}}
+# It is saved to profiles.match_features through the write-behind buffer
+# (migrations/003_match_features.sql) and published on the PROFILE_FEATURES_STREAM
+# so every API process can update its in-memory index (matching.py) without
+# reloading. This module has no heavy imports: the worker uses it too.
+
+PROFILE_FEATURES_STREAM = "profile_features"
+PROFILE_FEATURES_MAXLEN = int(os.environ.get("PROFILE_FEATURES_MAXLEN", "100000"))
+MAX_LANGUAGES = 8
+
+# File extension -> language
+LANGUAGE_EXTENSIONS = {
+    ".py": "python", ".ipynb": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".kt": "kotlin", ".kts": "kotlin", ".scala": "scala",
+    ".go": "go", ".rs": "rust",
+    ".c": "c", ".h": "c", ".cpp": "cpp", ".cc": "cpp", ".hpp": "cpp",
+    ".cs": "csharp", ".rb": "ruby", ".php": "php",
+    ".swift": "swift", ".dart": "dart",
+    ".sql": "sql", ".sh": "shell", ".bash": "shell",
+    ".html": "html", ".css": "css", ".scss": "css",
+}
+LANGUAGES = sorted(set(LANGUAGE_EXTENSIONS.values()))
+# What recruiters type -> language
+LANGUAGE_ALIASES = {
+    **{language: language for language in LANGUAGES},
+    "js": "javascript", "ts": "typescript", "golang": "go", "c++": "cpp", "c#": "csharp",
+    "bash": "shell", "postgresql": "sql", "mysql": "sql",
+}
+
+# skill -> phrases that mention it (matched as whole words, case-insensitive)
+SKILL_ALIASES = {
+    "react": ["react", "reactjs", "react.js"],
+    "nextjs": ["next.js", "nextjs"],
+    "vue": ["vue", "vuejs", "vue.js"],
+    "angular": ["angular"],
+    "nodejs": ["nodejs", "node.js", "express", "expressjs"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "spring": ["spring boot", "springboot", "spring framework"],
+    "rails": ["rails", "ruby on rails"],
+    "postgresql": ["postgres", "postgresql", "psycopg2"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo", "mongoose"],
+    "redis": ["redis"],
+    "graphql": ["graphql", "apollo"],
+    "rest_api": ["rest api", "rest apis", "restful"],
+    "docker": ["docker", "dockerfile", "docker-compose", "containerization"],
+    "kubernetes": ["kubernetes", "k8s", "helm"],
+    "terraform": ["terraform"],
+    "aws": ["aws", "amazon web services", "boto3", "ec2"],
+    "gcp": ["gcp", "google cloud", "bigquery"],
+    "azure": ["azure"],
+    "ci_cd": ["ci/cd", "cicd", "github actions", "jenkins", "gitlab ci"],
+    "prometheus": ["prometheus", "grafana"],
+    "kafka": ["kafka"],
+    "spark": ["spark", "pyspark"],
+    "celery": ["celery"],
+    "tensorflow": ["tensorflow", "keras"],
+    "pytorch": ["pytorch", "torch"],
+    "scikit_learn": ["scikit-learn", "sklearn"],
+    "data_analysis": ["pandas", "numpy", "matplotlib", "data analysis"],
+    "computer_vision": ["computer vision", "opencv", "cv2", "image recognition", "yolo"],
+    "nlp": ["nlp", "natural language processing", "transformers", "huggingface", "spacy"],
+    "llm": ["llm", "llms", "langchain", "openai", "gemini", "rag"],
+    "mlops": ["mlops", "mlflow", "kubeflow", "model deployment"],
+    "android": ["android"],
+    "ios": ["ios", "swiftui", "xcode"],
+    "flutter": ["flutter"],
+    "react_native": ["react native", "react-native", "expo"],
+    "blockchain": ["blockchain", "solidity", "web3", "ethereum"],
+}
+SKILLS = sorted(SKILL_ALIASES)
+# Short terms recruiters type that are too ambiguous to look for in free text
+_EXACT_SKILL_TERMS = {"node": "nodejs", "spring": "spring", "rest": "rest_api", "ci": "ci_cd", "lambda": "aws", "s3": "aws"}
+
+# Repo layout that proves a skill (matched against lower-cased file paths)
+SKILL_PATH_PATTERNS = [
+    (re.compile(r"(^|/)dockerfile$|(^|/)docker-compose\.ya?ml$"), "docker"),
+    (re.compile(r"(^|/)(k8s|kubernetes|helm)/|(^|/)chart\.yaml$"), "kubernetes"),
+    (re.compile(r"\.tf$"), "terraform"),
+    (re.compile(r"^\.github/workflows/|(^|/)\.gitlab-ci\.yml$|(^|/)jenkinsfile$"), "ci_cd"),
+    (re.compile(r"(^|/)manage\.py$"), "django"),
+    (re.compile(r"(^|/)next\.config\.(js|mjs|ts)$"), "nextjs"),
+    (re.compile(r"\.(jsx|tsx)$"), "react"),
+    (re.compile(r"\.vue$"), "vue"),
+    (re.compile(r"(^|/)pubspec\.yaml$"), "flutter"),
+    (re.compile(r"(^|/)androidmanifest\.xml$"), "android"),
+    (re.compile(r"\.xcodeproj/|\.swift$"), "ios"),
+    (re.compile(r"\.sol$"), "blockchain"),
+    (re.compile(r"\.graphql$|\.gql$"), "graphql"),
+]
+
+
+def _alias_pattern(aliases: list) -> re.Pattern:
+    alternatives = "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])")
+
+
+_SKILL_PATTERNS = {skill: _alias_pattern(aliases) for skill, aliases in SKILL_ALIASES.items()}
+_ALIAS_TO_SKILL = {
+    **{alias: skill for skill, aliases in SKILL_ALIASES.items() for alias in aliases},
+    **{skill: skill for skill in SKILLS},
+    **_EXACT_SKILL_TERMS,
+}
+
+
+def skills_in_text(text: str) -> set:
+    text = (text or "").lower()
+    return {skill for skill, pattern in _SKILL_PATTERNS.items() if pattern.search(text)}
+
+
+def normalize_skill(term: str) -> str | None:
+    """A recruiter-entered skill ("Node.js", "K8s") -> vocabulary skill, or None."""
+    term = term.strip().lower()
+    if term in _ALIAS_TO_SKILL:
+        return _ALIAS_TO_SKILL[term]
+    found = skills_in_text(term)
+    return found.pop() if len(found) == 1 else None
+
+
+def normalize_language(term: str) -> str | None:
+    return LANGUAGE_ALIASES.get(term.strip().lower())
+
+
+# --- 1. EXTRACTION (WORKER) ---
+def extract_features(fields: dict, context_packet: dict) -> dict:
+    """
+    `fields`: the finished profile fields (scores + justifications);
+    `context_packet`: the GitHub context packet the scores were made from.
+    """
+    language_counts = Counter()
+    code_skills = set()
+    for repo in context_packet.get("analyzed_repos", []):
+        for path in repo.get("file_list", []):
+            path = (path or "").lower()
+            language = LANGUAGE_EXTENSIONS.get(os.path.splitext(path)[1])
+            if language:
+                language_counts[language] += 1
+            code_skills.update(skill for pattern, skill in SKILL_PATH_PATTERNS if pattern.search(path))
+        for snippet in repo.get("raw_code_snippets", []):
+            # Imports and dependency manifests ("import torch", "django==4.2")
+            code_skills.update(skills_in_text(snippet.get("content")))
+
+    total = sum(language_counts.values())
+    languages = {
+        language: round(count / total, 3)
+        for language, count in language_counts.most_common(MAX_LANGUAGES)
+    } if total else {}
+
+    # Justifications only: feedback lists what the candidate should *learn*
+    mentioned = skills_in_text(f"{fields.get('resume_justification') or ''} {fields.get('github_justification') or ''}")
+    skills = {skill: 1.0 for skill in code_skills}
+    skills.update({skill: 0.5 for skill in mentioned - code_skills})
+
+    return {
+        "scores": {
+            "resume": fields.get("resume_score", 0),
+            "github": fields.get("github_score", 0),
+            "showoff": round(fields.get("showoff_score", 0), 2),
+        },
+        "languages": languages,
+        "skills": dict(sorted(skills.items())),
+    }
+
+
+# --- 2. INCREMENTAL REFRESH FEED ---
+def publish_features(user_id: str, features: dict):
+    """Announces a profile's new features to every API process's index."""
+    get_redis().xadd(
+        PROFILE_FEATURES_STREAM,
+        {"user_id": user_id, "features": json.dumps(features)},
+        maxlen=PROFILE_FEATURES_MAXLEN, approximate=True
+    )
@@ -0,0 +1,332 @@
+"""
+Load test for the API endpoints, against local stand-ins.
+
+Starts loadtest/stubs.py (Supabase + SMTP sink), then for each uvicorn
+--workers count starts the real API (main:app) pointed at the stubs and a
+local Redis, and drives every scenario with an asyncio httpx client: a fixed
+number of concurrent connections, each sending its next request as soon as
+the previous one returns. Reports RPS, latency percentiles and error rate per
+(workers, scenario) and compares them with baseline.json.
+
+Exits 1 if any scenario regressed (RPS, p95 or error rate beyond tolerance),
+so it can gate CI. Record a new baseline with --update-baseline, on the same
+machine the comparison will run on.
+
+The client is a single Python process: if it pegs a core, lower
+--concurrency or the numbers measure the client, not the API.
+
+Needs a local Redis (`docker compose up -d redis`). The whole database given
+by --redis-url is FLUSHED before every run: use a dedicated one (default db 15).
+Jobs queued by /rank_profile are flushed with it; no worker or LLM is involved.
+
+Run (from backend/):
+    python loadtest/run.py
+    python loadtest/run.py --workers 1 2 4 --duration 20 --concurrency 64
+    python loadtest/run.py --scenario rank_profile --supabase-latency-ms 40
+    python loadtest/run.py --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import redis
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(LOADTEST_DIR)
+BASELINE_FILE = os.path.join(LOADTEST_DIR, "baseline.json")
+
+sys.path.insert(0, BACKEND_DIR)
+from college_registry import load_registry
+
+
+# --- 1. SCENARIOS ---
+# Each builds the kwargs of one request. `n` is unique per request, so every
+# resume upload and every OTP email is new (no dedupe, cooldown or rate limit
+# short-circuits), except where the scenario is about exactly that.
+def _unique_pdf(n: int) -> bytes:
+    return b"%PDF-1.4\n% load test " + str(n).encode() + b"\n" + os.urandom(32 * 1024) + b"\n%%EOF\n"
+
+
+_REPEATED_PDF = _unique_pdf(-1)
+_COLLEGE_DOMAIN = sorted(load_registry().domains)[0]
+
+
+def _root(n: int) -> dict:
+    return {"method": "GET", "url": "/"}
+
+
+def _rank_profile(n: int, pdf_bytes: bytes | None = None) -> dict:
+    return {
+        "method": "POST",
+        "url": "/rank_profile",
+        "files": {"resume": (f"resume-{n}.pdf", pdf_bytes or _unique_pdf(n), "application/pdf")},
+        "data": {"github_username": f"loadtest-{n}", "user_id": f"loadtest-user-{n}"},
+    }
+
+
+def _rank_profile_resubmit(n: int) -> dict:
+    # Same bytes every time: the blob store skips the upload
+    return _rank_profile(n, _REPEATED_PDF)
+
+
+def _send_otp(n: int) -> dict:
+    return {
+        "method": "POST",
+        "url": "/college/send_otp",
+        "json": {"email": f"loadtest{n}@{_COLLEGE_DOMAIN}"},
+        # One client IP per request, as many students would be
+        "headers": {"X-Forwarded-For": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"},
+    }
+
+
+def _verify_otp(n: int) -> dict:
+    # No code was issued for this address: one Lua round-trip, then a 400
+    return {
+        "method": "POST",
+        "url": "/college/verify_otp",
+        "json": {"email": f"nobody{n}@{_COLLEGE_DOMAIN}", "otp": "000000", "user_id": f"loadtest-user-{n}"},
+    }
+
+
+# name -> (request builder, status codes that count as success)
+SCENARIOS = {
+    "root": (_root, {200}),
+    "rank_profile": (_rank_profile, {200}),
+    "rank_profile_resubmit": (_rank_profile_resubmit, {200}),
+    "college_send_otp": (_send_otp, {200}),
+    "college_verify_otp": (_verify_otp, {400}),
+}
+
+
+# --- 2. PROCESSES UNDER TEST ---
+def _api_env(args) -> dict:
+    return {
+        **os.environ,
+        "SUPABASE_URL": f"http://127.0.0.1:{args.stub_port}",
+        "SUPABASE_KEY": "stub.stub.stub", # The SDK only checks that it is JWT-shaped
+        "REDIS_URL": args.redis_url,
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(args.smtp_port),
+        "SMTP_USERNAME": "loadtest",
+        "SMTP_PASSWORD": "loadtest",
+        "EMAIL_FROM": "loadtest@localhost",
+        "SMTP_USE_SSL": "false",
+        # Every request is a distinct student; keep the limits out of the way
+        "OTP_MAX_SENDS_PER_EMAIL": "1000000000",
+        "OTP_MAX_SENDS_PER_DOMAIN": "1000000000",
+        "OTP_MAX_SENDS_PER_IP": "1000000000",
+        "FORWARDED_PROXY_HOPS": "1",
+    }
+
+
+def _start(cmd: list, env: dict | None = None, log_path: str | None = None) -> subprocess.Popen:
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def _stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+async def _wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+# --- 3. LOAD GENERATION ---
+async def _drive(client: httpx.AsyncClient, scenario: str, concurrency: int, seconds: float, counter: list) -> list:
+    """Closed loop: `concurrency` connections, each firing its next request when the last returns."""
+    build, ok_statuses = SCENARIOS[scenario]
+    deadline = time.perf_counter() + seconds
+    samples = []
+
+    async def connection():
+        while time.perf_counter() < deadline:
+            counter[0] += 1
+            request = build(counter[0])
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                ok = response.status_code in ok_statuses
+            except httpx.HTTPError:
+                ok = False
+            samples.append((time.perf_counter() - start, ok))
+
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return samples
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    latencies = sorted(latency for latency, ok in samples if ok)
+    errors = sum(1 for _latency, ok in samples if not ok)
+    if not latencies:
+        return {"requests": len(samples), "rps": 0.0, "error_rate": 1.0,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    return {
+        "requests": len(samples),
+        "rps": round(len(latencies) / seconds, 1),
+        "error_rate": round(errors / len(samples), 4),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+    }
+
+
+async def run_scenarios(base_url: str, scenarios: list, args) -> dict:
+    results = {}
+    counter = [random.randrange(1 << 30)] # Unique request ids across runs
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for scenario in scenarios:
+            await _drive(client, scenario, args.concurrency, args.warmup, counter)
+            samples = await _drive(client, scenario, args.concurrency, args.duration, counter)
+            results[scenario] = summarize(samples, args.duration)
+            r = results[scenario]
+            print(f"  {scenario:<24} {r['rps']:>9.1f} {_ms(r['p50_ms'])} {_ms(r['p95_ms'])} {_ms(r['p99_ms'])} {r['error_rate']:>8.2%}")
+    return results
+
+
+def _ms(value) -> str:
+    return f"{'n/a':>9}" if value is None else f"{value:>9.1f}"
+
+
+# --- 4. BASELINE COMPARISON ---
+def compare(results: dict, baseline: dict, args) -> list:
+    """Returns one message per regressed metric; scenarios missing from the baseline are skipped."""
+    regressions = []
+    for workers, by_scenario in results.items():
+        for scenario, r in by_scenario.items():
+            base = baseline.get("results", {}).get(workers, {}).get(scenario)
+            if not base:
+                continue
+            label = f"workers={workers} {scenario}"
+            if r["rps"] < base["rps"] * (1 - args.rps_tolerance):
+                regressions.append(f"{label}: {r['rps']} rps < baseline {base['rps']} (-{args.rps_tolerance:.0%} allowed)")
+            if r["p95_ms"] is not None and base["p95_ms"] is not None \
+                    and r["p95_ms"] > base["p95_ms"] * (1 + args.latency_tolerance):
+                regressions.append(f"{label}: p95 {r['p95_ms']} ms > baseline {base['p95_ms']} ms (+{args.latency_tolerance:.0%} allowed)")
+            if r["error_rate"] > base["error_rate"] + args.error_tolerance:
+                regressions.append(f"{label}: error rate {r['error_rate']:.2%} > baseline {base['error_rate']:.2%}")
+    return regressions
+
+
+def _load_baseline() -> dict:
+    try:
+        with open(BASELINE_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# --- 5. HARNESS ---
+async def main_async(args) -> int:
+    redis_client = redis.Redis.from_url(args.redis_url)
+    try:
+        redis_client.ping()
+    except redis.RedisError as e:
+        print(f"ERROR: Redis is not reachable at {args.redis_url} ({e}). Try `docker compose up -d redis`.")
+        return 2
+
+    stubs = _start([sys.executable, os.path.join(LOADTEST_DIR, "stubs.py"),
+                    "--http-port", str(args.stub_port), "--smtp-port", str(args.smtp_port),
+                    "--latency-ms", str(args.supabase_latency_ms)])
+    results = {}
+    try:
+        await _wait_until_up(f"http://127.0.0.1:{args.stub_port}/stub/stats")
+        for workers in args.workers:
+            redis_client.flushdb()
+            print(f"\n--- uvicorn --workers {workers}: {args.concurrency} connections, {args.duration}s per scenario ---")
+            print(f"  {'Scenario':<24} {'RPS':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Errors':>8}")
+            api = _start([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                          "--port", str(args.api_port), "--workers", str(workers), "--log-level", "warning"],
+                         env=_api_env(args), log_path=args.api_log)
+            try:
+                await _wait_until_up(f"http://127.0.0.1:{args.api_port}/")
+                results[str(workers)] = await run_scenarios(f"http://127.0.0.1:{args.api_port}", args.scenario, args)
+            finally:
+                _stop(api)
+    finally:
+        _stop(stubs)
+        redis_client.flushdb()
+
+    config = {"concurrency": args.concurrency, "duration": args.duration,
+              "supabase_latency_ms": args.supabase_latency_ms}
+    if args.update_baseline:
+        baseline = _load_baseline()
+        baseline.setdefault("results", {}).update(results)
+        baseline.update({"config": config, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                         "python": sys.version.split()[0], "cpus": os.cpu_count()})
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {os.path.relpath(BASELINE_FILE)}")
+        return 0
+
+    baseline = _load_baseline()
+    if not baseline:
+        print(f"\nNo baseline yet ({os.path.relpath(BASELINE_FILE)}); record one with --update-baseline.")
+        return 0
+    if baseline.get("config") != config:
+        print(f"\nWARNING: baseline was recorded with {baseline.get('config')}, this run used {config}.")
+
+    regressions = compare(results, baseline, args)
+    if regressions:
+        print(f"\n--- {len(regressions)} REGRESSION(S) vs baseline ---")
+        for message in regressions:
+            print(f"  > {message}")
+        return 1
+    print("\n--- No regressions vs baseline ---")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against local stand-ins")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="uvicorn --workers counts")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario(s) to run (default: all)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout (a timeout is an error)")
+    parser.add_argument("--supabase-latency-ms", type=float, default=0, help="Added delay per stubbed Supabase call")
+    parser.add_argument("--redis-url", default=os.environ.get("LOADTEST_REDIS_URL", "redis://localhost:6379/15"),
+                        help="Dedicated Redis database (flushed!)")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=54321)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--api-log", help="Write the API's output here (default: discarded)")
+    parser.add_argument("--rps-tolerance", type=float, default=0.15, help="Allowed RPS drop (fraction)")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Allowed p95 increase (fraction)")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="Allowed error-rate increase (absolute)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Record this run in {os.path.basename(BASELINE_FILE)}")
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS)
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Local stand-ins for the API's external services, for load tests.
+
+- Supabase: a catch-all FastAPI app that answers PostgREST (/rest/v1/...)
+  and Storage (/storage/v1/...) calls the way the SDK expects, without
+  persisting anything. --latency-ms adds a fixed delay per call to mimic the
+  round-trip to a hosted project.
+- SMTP: a minimal sink that accepts AUTH PLAIN and any message, and drops it.
+  The API talks to it with SMTP_USE_SSL=false.
+
+Redis is the real thing (docker-compose.yml). loadtest/run.py starts this
+script for you; to poke at the stubs by hand:
+
+Run (from backend/):
+    python loadtest/stubs.py --http-port 54321 --smtp-port 2525
+"""
+import argparse
+import asyncio
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+STUB_PDF = b"%PDF-1.4\n% load-test stub\n%%EOF\n"
+
+
+# --- 1. SUPABASE (POSTGREST + STORAGE) ---
+def build_supabase_stub(latency_ms: float) -> FastAPI:
+    app = FastAPI(title="Supabase stub")
+    stats = {"rest": 0, "storage": 0}
+
+    async def _delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.api_route("/rest/v1/{path:path}", methods=["GET", "POST", "PATCH", "PUT", "DELETE"])
+    async def postgrest(path: str, request: Request):
+        await _delay()
+        stats["rest"] += 1
+        # select / update / upsert with return=representation all parse a list
+        return Response(content="[]", media_type="application/json", headers={"Content-Range": "0-0/0"})
+
+    @app.post("/storage/v1/object/list/{bucket}")
+    async def storage_list(bucket: str):
+        await _delay()
+        stats["storage"] += 1
+        return []
+
+    @app.api_route("/storage/v1/object/{bucket}/{path:path}", methods=["GET", "POST", "PUT"])
+    async def storage_object(bucket: str, path: str, request: Request):
+        await _delay()
+        stats["storage"] += 1
+        if request.method == "GET":
+            return Response(content=STUB_PDF, media_type="application/pdf")
+        await request.body() # Consume the upload like the real server would
+        return {"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())}
+
+    @app.delete("/storage/v1/object/{bucket}")
+    async def storage_remove(bucket: str):
+        await _delay()
+        stats["storage"] += 1
+        return []
+
+    @app.get("/stub/stats")
+    async def stub_stats():
+        return stats
+
+    return app
+
+
+# --- 2. SMTP SINK ---
+class SmtpSink:
+    """Speaks just enough ESMTP for smtplib.SMTP: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, QUIT."""
+    def __init__(self):
+        self.messages = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 loadtest-sink ESMTP")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode(errors="replace").strip().upper()
+                if command.startswith("EHLO"):
+                    reply("250-loadtest-sink")
+                    reply("250-AUTH PLAIN")
+                    reply("250 8BITMIME")
+                elif command.startswith("AUTH"):
+                    reply("235 2.7.0 Authentication successful")
+                elif command.startswith("DATA"):
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    self.messages += 1
+                    reply("250 2.0.0 Queued")
+                elif command.startswith("QUIT"):
+                    reply("221 2.0.0 Bye")
+                    await writer.drain()
+                    break
+                else: # HELO, MAIL FROM, RCPT TO, RSET, NOOP
+                    reply("250 OK")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+# --- 3. ENTRYPOINT ---
+async def serve(http_port: int, smtp_port: int, latency_ms: float):
+    sink = SmtpSink()
+    smtp_server = await asyncio.start_server(sink.handle, "127.0.0.1", smtp_port)
+    config = uvicorn.Config(build_supabase_stub(latency_ms), host="127.0.0.1", port=http_port, log_level="warning")
+    print(f"--- [Stubs] Supabase on :{http_port} ({latency_ms} ms), SMTP sink on :{smtp_port} ---", flush=True)
+    try:
+        async with smtp_server:
+            await uvicorn.Server(config).serve()
+    finally:
+        print(f"--- [Stubs] SMTP sink received {sink.messages} messages ---", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supabase + SMTP stand-ins for load tests")
+    parser.add_argument("--http-port", type=int, default=54321)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added delay per Supabase call")
+    args = parser.parse_args()
+    asyncio.run(serve(args.http_port, args.smtp_port, args.latency_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,33 @@
 import uvicorn
 import os
 import json
-import random
-import string
+import time
+import asyncio
+import secrets
 import smtplib
 import ssl
-import redis
+import zipfile
+import hashlib
+from contextlib import asynccontextmanager
 from email.message import EmailMessage
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from celery import Celery
-from supabase import create_client, Client
+from pydantic import BaseModel, EmailStr, Field
 from fastapi.concurrency import run_in_threadpool
-from dotenv import load_dotenv
 
 # --- 1. CONFIGURATION ---
-load_dotenv() # This loads the .env file
-
-REDIS_URL = os.environ.get("REDIS_URL")
-if REDIS_URL and REDIS_URL.startswith("rediss://"):
-    REDIS_URL = f"{REDIS_URL}?ssl_cert_reqs=none"
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") # This MUST be your Service Role Key
+# Env loading and all client construction live in clients.py; clients are
+# built lazily on first use so the API's cold start stays small.
+from clients import SUPABASE_URL, SUPABASE_KEY, get_supabase, get_redis
+from producer import send_deep_analysis, send_batch
+from profiling import list_slow_jobs
+from score_writer import leaderboard_rank
+import batches
+import blob_store
+import otp_store
+import matching
+from college_registry import get_registry
+from otp_store import OTP_TTL_SECONDS
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("--- CRITICAL ERROR: SUPABASE_URL or SUPABASE_KEY not set in .env file ---")
@@ -33,36 +38,36 @@ SMTP_PORT = int(os.environ.get("SMTP_PORT", "465"))
 SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
 EMAIL_FROM = os.environ.get("EMAIL_FROM")
-
-# Redis client for OTP storage
-redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
-OTP_TTL_SECONDS = int(os.environ.get("OTP_TTL_SECONDS", "600"))
-OTP_PREFIX = "college_otp:"
-
-COLLEGE_DOMAINS = {
-    'iitb.ac.in': 'IIT Bombay',
-    'iitd.ac.in': 'IIT Delhi',
-    'iitm.ac.in': 'IIT Madras',
-    'iitk.ac.in': 'IIT Kanpur',
-    'iitkgp.ac.in': 'IIT Kharagpur',
-    'iitr.ac.in': 'IIT Roorkee',
-    'iitg.ac.in': 'IIT Guwahati',
-    'iitbhu.ac.in': 'IIT BHU',
-    'iith.ac.in': 'IIT Hyderabad',
-    'nitt.edu': 'NIT Trichy',
-    'nitk.edu.in': 'NIT Surathkal',
-    'nitw.ac.in': 'NIT Warangal',
-    'nitc.ac.in': 'NIT Calicut'
-}
-
-# --- 2. SETUP: FASTAPI, CELERY, SUPABASE ---
-app = FastAPI(title="GradPipe Showoff API (v3.1 - Job Submitter)")
-
-# Connect to Celery (Redis)
-celery_app = Celery("tasks", broker=REDIS_URL, backend=REDIS_URL)
-
-# Connect to Supabase (with Service Key)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Implicit TLS (port 465) by default; "false" for a plain local relay / test sink
+SMTP_USE_SSL = os.environ.get("SMTP_USE_SSL", "true").lower() != "false"
+
+# Shared secret for the internal /admin/*, /match/* and /rank_profiles/batch
+# endpoints (sent as X-Admin-Token)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# OTP storage, rate limits and attempt limits live in otp_store.py.
+# Number of trusted proxies in front of us (Render adds one X-Forwarded-For hop)
+FORWARDED_PROXY_HOPS = int(os.environ.get("FORWARDED_PROXY_HOPS", "1"))
+
+# Recruiter batch uploads (/rank_profiles/batch)
+MAX_BATCH_FILES = int(os.environ.get("MAX_BATCH_FILES", "200"))
+MAX_RESUME_BYTES = int(os.environ.get("MAX_RESUME_BYTES", str(10 * 1024 * 1024)))
+BATCH_MANIFEST_NAME = "manifest.json" # {"<file in zip>": "<github username>"}
+
+# --- 2. SETUP: FASTAPI ---
+# Celery (see producer.py), Supabase and Redis (see clients.py) connect on first use.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the college registry (data/colleges.json) once, before serving
+    get_registry()
+    # Refuse to start with OTP limits the Lua scripts cannot honour
+    otp_store.validate_config()
+    # Load the job-matching index in the background, then keep it current
+    refresher = asyncio.create_task(matching.refresh_forever())
+    yield
+    refresher.cancel()
+
+app = FastAPI(title="GradPipe Showoff API (v3.1 - Job Submitter)", lifespan=lifespan)
 
 # 3. Set up CORS
 # Allow multiple origins from environment variable, fallback to localhost for dev
@@ -82,6 +87,12 @@ class JobStatus(BaseModel):
     status: str
     message: str
 
+class BatchSubmitted(BaseModel):
+    batch_id: str
+    status: str
+    total: int
+    duplicates: int
+
 class CollegeSendOtpRequest(BaseModel):
     email: EmailStr
 
@@ -93,14 +104,28 @@ class CollegeVerifyOtpRequest(BaseModel):
 class CollegeResetRequest(BaseModel):
     user_id: str
 
+class JobPosting(BaseModel):
+    title: str
+    description: str = ""
+    skills: list[str] = []
+    languages: list[str] = []
+    min_showoff_score: float = Field(0, ge=0, le=100)
+    top_k: int = Field(20, ge=1, le=200)
+
 def _ensure_email_service_configured():
     if not all([SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, EMAIL_FROM]):
         raise HTTPException(status_code=500, detail="Email service is not configured. Please set SMTP credentials.")
 
 def _ensure_redis_configured():
-    if not redis_client:
+    if not get_redis():
         raise HTTPException(status_code=500, detail="OTP storage is not configured. Please set REDIS_URL.")
 
+def _ensure_admin(token: str | None):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled. Please set ADMIN_TOKEN.")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
 def send_verification_email(recipient: str, otp: str, college_name: str):
     _ensure_email_service_configured()
     message = EmailMessage()
@@ -122,48 +147,109 @@ If you did not initiate this verification, please ignore this email.
 """
     message.set_content(body)
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context) as server:
+    if SMTP_USE_SSL:
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=ssl.create_default_context())
+    else:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    with server:
         server.login(SMTP_USERNAME, SMTP_PASSWORD)
         server.send_message(message)
 
-def _store_otp(email: str, otp: str, college_name: str):
-    _ensure_redis_configured()
-    key = f"{OTP_PREFIX}{email.lower()}"
-    payload = json.dumps({"otp": otp, "college_name": college_name})
-    redis_client.setex(key, OTP_TTL_SECONDS, payload)
-
-def _retrieve_otp(email: str):
-    _ensure_redis_configured()
-    key = f"{OTP_PREFIX}{email.lower()}"
-    value = redis_client.get(key)
-    if not value:
-        return None
-    try:
-        return json.loads(value)
-    except json.JSONDecodeError:
-        return None
+def _client_ip(request: Request) -> str:
+    """
+    The caller's IP. Behind a proxy, the right-most X-Forwarded-For entries
+    are the ones our own proxies appended, so we count FORWARDED_PROXY_HOPS
+    from the right (left-most entries are client-controlled).
+    """
+    forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+    if FORWARDED_PROXY_HOPS and len(forwarded) >= FORWARDED_PROXY_HOPS:
+        return forwarded[-FORWARDED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
 
-def _delete_otp(email: str):
-    if redis_client:
-        redis_client.delete(f"{OTP_PREFIX}{email.lower()}")
+def _too_many_requests(detail: str, retry_ms: int):
+    retry_after = max(1, -(-int(retry_ms) // 1000)) # Round up to whole seconds
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
 
 # --- 5. SYNCHRONOUS HELPER FOR UPLOADS ---
-def upload_to_storage_sync(path: str, file_bytes: bytes):
+def store_resume_sync(user_id: str, filename: str, file_bytes: bytes) -> str:
     """
     This is a blocking function. We will run it in a threadpool.
+    Stores the PDF once per content hash (see blob_store.py), points the
+    profile at it, marks its analysis as processing and returns the blob
+    path for the worker.
+    """
+    sha256, path = blob_store.put_blob(file_bytes)
+    blob_store.set_resume_pointer(user_id, sha256, filename, {"analysis_status": "processing", "analysis_error": None})
+    print(f"--- [API] Resume for {user_id} stored at: {path} ---")
+    return path
+
+class _BatchIntake:
     """
+    Collects the items of one recruiter batch as files arrive.
+    Each file is uploaded as soon as it is read (never the whole batch in
+    memory). Files go to the shared blob store (once per content hash, across
+    batches and profiles), and repeated
+    (content hash, GitHub username) pairs are dropped as duplicates.
+    Blocking: run add() in the threadpool.
+    """
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self.items = {}
+        self.duplicates = 0
+        self._seen = set()
+        self._stored = {}
+
+    def add(self, filename: str, github_username: str, pdf_bytes: bytes):
+        github_username = (github_username or "").strip()
+        if not github_username:
+            raise HTTPException(status_code=400, detail=f"Missing GitHub username for '{filename}'.")
+        if len(pdf_bytes) > MAX_RESUME_BYTES:
+            raise HTTPException(status_code=413, detail=f"'{filename}' is larger than {MAX_RESUME_BYTES // (1024 * 1024)} MB.")
+
+        sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        key = (sha256, github_username.lower())
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        if len(self.items) >= MAX_BATCH_FILES:
+            raise HTTPException(status_code=413, detail=f"A batch can contain at most {MAX_BATCH_FILES} resumes.")
+        self._seen.add(key)
+
+        if sha256 not in self._stored:
+            _sha, self._stored[sha256] = blob_store.put_blob(pdf_bytes)
+        resume_path = self._stored[sha256]
+
+        self.items[f"{len(self.items):04d}"] = {
+            "filename": filename,
+            "github_username": github_username,
+            "sha256": sha256,
+            "resume_path": resume_path,
+        }
+
+def _ingest_zip(fileobj, intake: _BatchIntake):
+    """Reads a zip of PDFs plus manifest.json, one member at a time."""
     try:
-        # The supabase-python client's storage is synchronous
-        supabase.storage.from_("resumes").upload(
-            path=path,
-            file=file_bytes,
-            file_options={"content-type": "application/pdf", "upsert": "true"}
-        )
-        print(f"--- [API] File uploaded to: {path} ---")
-    except Exception as e:
-        # We'll let the main thread handle the exception
-        raise e
+        with zipfile.ZipFile(fileobj) as archive:
+            try:
+                manifest = json.loads(archive.read(BATCH_MANIFEST_NAME))
+            except KeyError:
+                raise HTTPException(status_code=400, detail=f"Zip must contain {BATCH_MANIFEST_NAME} mapping each file to a GitHub username.")
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail=f"{BATCH_MANIFEST_NAME} is not valid JSON.")
+            if not isinstance(manifest, dict):
+                raise HTTPException(status_code=400, detail=f"{BATCH_MANIFEST_NAME} must be an object of {{file: github_username}}.")
+
+            for name, github_username in manifest.items():
+                try:
+                    info = archive.getinfo(name)
+                except KeyError:
+                    raise HTTPException(status_code=400, detail=f"'{name}' is listed in {BATCH_MANIFEST_NAME} but missing from the zip.")
+                # Check the declared size before inflating anything
+                if info.file_size > MAX_RESUME_BYTES:
+                    raise HTTPException(status_code=413, detail=f"'{name}' is larger than {MAX_RESUME_BYTES // (1024 * 1024)} MB.")
+                intake.add(os.path.basename(name), github_username, archive.read(info))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid zip file.")
 
 # --- 6. THE NEW "JOB SUBMITTER" ENDPOINT ---
 @app.post("/rank_profile", response_model=JobStatus)
@@ -185,21 +271,17 @@ async def rank_profile(
         raise HTTPException(status_code=400, detail=f"Error reading file: {e}")
 
     # 2. Save Resume to Supabase Storage (in a thread)
-    # The RLS policy we wrote requires the path to start with the user's ID
-    resume_path = f"{user_id}/{resume.filename}"
+    # Content-addressed: re-submitting the same PDF uploads nothing
     try:
         # Run the blocking 'upload' in a separate thread
-        await run_in_threadpool(upload_to_storage_sync, resume_path, pdf_bytes)
+        resume_path = await run_in_threadpool(store_resume_sync, user_id, resume.filename, pdf_bytes)
     except Exception as e:
         print(f"--- [API] ERROR uploading file: {e} ---")
         raise HTTPException(status_code=500, detail=f"Error saving file: {e}")
 
     # 3. Create Celery Job
     try:
-        celery_app.send_task(
-            "run_deep_analysis", # This task name must match our future worker.py
-            args=[user_id, github_username, resume_path]
-        )
+        send_deep_analysis(user_id, github_username, resume_path)
         print(f"--- [API] Job sent to Celery/Redis for user: {user_id} ---")
     except Exception as e:
         print(f"--- [API] ERROR sending to Celery: {e} ---")
@@ -212,23 +294,111 @@ async def rank_profile(
         "message": "Your profile analysis has started. Scores will appear on your dashboard."
     }
 
+# --- 7. RECRUITER BATCH SUBMISSION ---
+@app.post("/rank_profiles/batch", response_model=BatchSubmitted)
+async def rank_profiles_batch(
+    request: Request,
+    recruiter_id: str = Form(...),
+    resumes: list[UploadFile] | None = File(None),
+    github_usernames: list[str] | None = Form(None),
+    archive: UploadFile | None = File(None),
+    x_admin_token: str | None = Header(None)
+):
+    """
+    Bulk version of /rank_profile. Accepts EITHER:
+    - `resumes` (multiple PDFs) with `github_usernames` in the same order, OR
+    - `archive`: a zip of PDFs plus a manifest.json of {file: github_username}.
+    Returns a batch id; poll GET /rank_profiles/batch/{batch_id} for progress.
+    Requires the X-Admin-Token header; at most BATCH_MAX_PER_IP batches per
+    client IP per BATCH_RATE_WINDOW_SECONDS.
+    """
+    _ensure_admin(x_admin_token)
+    _ensure_redis_configured()
+    retry_ms = batches.take_submission_slot(_client_ip(request))
+    if retry_ms is not None:
+        raise _too_many_requests("Too many batches submitted. Please try again later.", retry_ms)
+    batch_id = batches.new_batch_id()
+    intake = _BatchIntake(batch_id)
+    print(f"--- [API] Batch {batch_id} received from recruiter: {recruiter_id} ---")
+
+    try:
+        if archive is not None:
+            await run_in_threadpool(_ingest_zip, archive.file, intake)
+        elif resumes:
+            if not github_usernames or len(github_usernames) != len(resumes):
+                raise HTTPException(status_code=400, detail="Provide exactly one github_username per resume.")
+            for resume, github_username in zip(resumes, github_usernames):
+                pdf_bytes = await resume.read()
+                await run_in_threadpool(intake.add, resume.filename, github_username, pdf_bytes)
+        else:
+            raise HTTPException(status_code=400, detail="Upload either 'resumes' or a zip 'archive'.")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"--- [API] ERROR ingesting batch {batch_id}: {e} ---")
+        raise HTTPException(status_code=500, detail=f"Error saving files: {e}")
+
+    if not intake.items:
+        raise HTTPException(status_code=400, detail="The batch contains no resumes.")
+
+    try:
+        batches.create_batch(batch_id, recruiter_id, intake.items, intake.duplicates)
+        send_batch(batch_id, {
+            item_id: (item["github_username"], item["resume_path"]) for item_id, item in intake.items.items()
+        })
+        print(f"--- [API] Batch {batch_id} queued: {len(intake.items)} jobs, {intake.duplicates} duplicates ---")
+    except Exception as e:
+        print(f"--- [API] ERROR queueing batch {batch_id}: {e} ---")
+        raise HTTPException(status_code=500, detail=f"Error queueing batch: {e}")
+
+    return {
+        "batch_id": batch_id,
+        "status": "processing",
+        "total": len(intake.items),
+        "duplicates": intake.duplicates,
+    }
+
+@app.get("/rank_profiles/batch/{batch_id}")
+def get_batch_status(
+    batch_id: str,
+    recruiter_id: str = Query(...),
+    x_admin_token: str | None = Header(None)
+):
+    """Aggregate progress plus every result finished so far. Requires the X-Admin-Token header."""
+    _ensure_admin(x_admin_token)
+    _ensure_redis_configured()
+    batch = batches.get_batch(batch_id)
+    if not batch or batch["recruiter_id"] != recruiter_id:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return batch
+
 @app.post("/college/send_otp")
-def send_college_otp(payload: CollegeSendOtpRequest):
+def send_college_otp(payload: CollegeSendOtpRequest, request: Request):
     email = payload.email.lower()
     if "@" not in email:
         raise HTTPException(status_code=400, detail="Invalid email address.")
-    domain = email.split("@")[-1]
-    college_name = COLLEGE_DOMAINS.get(domain)
-    if not college_name:
+    # Matches the college domain or any subdomain (e.g. cse.iitb.ac.in)
+    registry = get_registry()
+    college_domain = registry.match_email(email)
+    if not college_domain:
         raise HTTPException(status_code=400, detail="Sorry, this college is not yet supported.")
+    college_name = registry.domains[college_domain]
 
-    otp = ''.join(random.choices(string.digits, k=6))
-    _store_otp(email, otp, college_name)
+    _ensure_email_service_configured()
+    _ensure_redis_configured()
+    otp = f"{secrets.randbelow(10**6):06d}"
+    # One round-trip: cooldown + per-email/domain/IP sliding windows + store
+    result = otp_store.issue_otp(email, otp, college_name, college_domain, _client_ip(request), int(time.time() * 1000))
+    if result[0] == "cooldown":
+        raise _too_many_requests("Please wait before requesting another code.", result[1])
+    if result[0] == "rate_limited":
+        print(f"--- [OTP] Rate limited ({result[1]}) for {email} ---")
+        raise _too_many_requests("Too many verification requests. Please try again later.", result[2])
 
     try:
         send_verification_email(email, otp, college_name)
     except Exception as exc:
-        _delete_otp(email)
+        otp_store.discard_otp(email)
         print(f"--- [OTP] ERROR sending email: {exc}")
         raise HTTPException(status_code=500, detail="Failed to send verification email.")
 
@@ -237,18 +407,20 @@ def send_college_otp(payload: CollegeSendOtpRequest):
 @app.post("/college/verify_otp")
 def verify_college_otp(payload: CollegeVerifyOtpRequest):
     email = payload.email.lower()
-    otp_record = _retrieve_otp(email)
-    if not otp_record:
+    _ensure_redis_configured()
+    # One round-trip: compare, count the attempt, consume on success
+    result = otp_store.verify_otp(email, payload.otp.strip())
+    if result[0] == "missing":
         raise HTTPException(status_code=400, detail="OTP expired or not found.")
+    if result[0] == "locked":
+        raise HTTPException(status_code=429, detail="Too many incorrect attempts. Please request a new code.")
+    if result[0] == "mismatch":
+        raise HTTPException(status_code=400, detail=f"Incorrect verification code. {result[1]} attempt(s) left.")
 
-    if payload.otp != otp_record.get("otp"):
-        raise HTTPException(status_code=400, detail="Incorrect verification code.")
-
-    college_name = otp_record.get("college_name")
-    _delete_otp(email)
+    college_name = result[1]
 
     try:
-        update_response = supabase.from_("profiles").update({"verified_college": college_name}).eq("user_id", payload.user_id).execute()
+        update_response = get_supabase().from_("profiles").update({"verified_college": college_name}).eq("user_id", payload.user_id).execute()
         if update_response.get("error"):
             raise Exception(update_response["error"])
     except Exception as exc:
@@ -260,7 +432,7 @@ def verify_college_otp(payload: CollegeVerifyOtpRequest):
 @app.post("/college/reset_verification")
 def reset_college_verification(payload: CollegeResetRequest):
     try:
-        update_response = supabase.from_("profiles").update({"verified_college": None}).eq("user_id", payload.user_id).execute()
+        update_response = get_supabase().from_("profiles").update({"verified_college": None}).eq("user_id", payload.user_id).execute()
         if update_response.get("error"):
             raise Exception(update_response["error"])
     except Exception as exc:
@@ -268,6 +440,57 @@ def reset_college_verification(payload: CollegeResetRequest):
         raise HTTPException(status_code=500, detail="Failed to reset college verification status.")
     return {"status": "reset"}
 
+@app.post("/match/candidates")
+def match_candidates(posting: JobPosting, x_admin_token: str | None = Header(None)):
+    """
+    Ranks candidates for a job posting: listed skills and languages, skills
+    mentioned in the title/description, and showoff_score (see matching.py).
+    Requires the X-Admin-Token header.
+    """
+    _ensure_admin(x_admin_token)
+    index = matching.get_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="The match index is still loading. Please try again shortly.")
+    start = time.perf_counter()
+    query = matching.MatchQuery(posting.skills, posting.languages, posting.description, posting.title)
+    try:
+        candidates = matching.rank_candidates(index, query, posting.top_k, posting.min_showoff_score)
+    except Exception as e:
+        print(f"--- [API] ERROR matching candidates: {e} ---")
+        raise HTTPException(status_code=500, detail="Failed to match candidates.")
+    return {
+        "candidates": candidates,
+        "skills": sorted(query.skills),
+        "languages": sorted(query.languages),
+        "unrecognized_terms": query.unrecognized,
+        "profiles_indexed": len(index),
+        "took_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+@app.get("/leaderboard/rank/{user_id}")
+def get_leaderboard_rank(user_id: str):
+    """A profile's current showoff_score rank, from the leaderboard sorted set (see score_writer.py)."""
+    if not get_redis():
+        raise HTTPException(status_code=503, detail="The leaderboard is not configured. Please set REDIS_URL.")
+    try:
+        return leaderboard_rank(user_id)
+    except Exception as e:
+        print(f"--- [API] ERROR reading leaderboard rank: {e} ---")
+        raise HTTPException(status_code=500, detail="Failed to read the leaderboard.")
+
+@app.get("/admin/slow_jobs")
+def get_slow_jobs(
+    limit: int = Query(20, ge=1, le=200),
+    x_admin_token: str | None = Header(None)
+):
+    """
+    Lists the slowest recent worker jobs with their per-phase breakdown
+    (recorded by the worker when a job exceeds SLOW_JOB_THRESHOLD_SECONDS).
+    """
+    _ensure_admin(x_admin_token)
+    _ensure_redis_configured()
+    return {"jobs": list_slow_jobs(limit)}
+
 @app.get("/")
 def read_root():
     return {"status": "GradPipe Showoff API is running (v3.1 - Job Submitter)"}
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+from clients import get_redis, get_supabase
+import features
+from features import LANGUAGES, SKILLS, PROFILE_FEATURES_STREAM
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# --- CANDIDATE <-> JOB MATCHING ---
+# Every API process keeps all candidates' features (see features.py) in one
+# float32 matrix, one row per profile, one column per score / language /
+# skill. A job posting becomes a weight vector over the same columns, so
+# ranking every candidate is a single matrix-vector product plus an
+# argpartition for the top K: a few milliseconds for 100k profiles
+# (benchmarks/matching.py).
+#
+# The index is loaded from profiles.match_features when the API starts, then
+# kept current by tailing the PROFILE_FEATURES_STREAM the worker appends to
+# after each finished analysis. Who opted into recruiter discovery is loaded
+# with it and re-read every MATCH_OPT_IN_REFRESH_SECONDS (the app toggles the
+# flag straight in Supabase, so there is no event to tail); an opt-out can
+# take that long to apply. numpy is imported on first use.
+
+MATCH_PAGE_SIZE = 1000
+MATCH_REFRESH_BLOCK_MS = int(os.environ.get("MATCH_REFRESH_BLOCK_MS", "2000"))
+MATCH_RETRY_SECONDS = float(os.environ.get("MATCH_RETRY_SECONDS", "10"))
+# Only candidates who opted into recruiter discovery (profiles.b2b_opt_in,
+# migrations/003_match_features.sql; off by default, set by the dashboard
+# toggle). Until candidates opt in, every match result is empty.
+MATCH_REQUIRE_OPT_IN = os.environ.get("MATCH_REQUIRE_OPT_IN", "true").lower() != "false"
+MATCH_OPT_IN_REFRESH_SECONDS = float(os.environ.get("MATCH_OPT_IN_REFRESH_SECONDS", "60"))
+
+# Column layout of the matrix
+SCORE_COLUMNS = ["resume", "github", "showoff"]
+COLUMNS = SCORE_COLUMNS + [f"language:{l}" for l in LANGUAGES] + [f"skill:{s}" for s in SKILLS]
+_COLUMN = {name: i for i, name in enumerate(COLUMNS)}
+SHOWOFF_COLUMN = _COLUMN["showoff"]
+
+# Share of a candidate's analyzed code in a language that counts as "fluent"
+LANGUAGE_FULL_SHARE = 0.25
+# How a match score is made up (renormalized over the parts a posting uses)
+SKILL_WEIGHT = 0.6
+LANGUAGE_WEIGHT = 0.2
+QUALITY_WEIGHT = 0.2 # showoff_score
+# A skill only found in the description counts half as much as a listed one
+DESCRIPTION_SKILL_WEIGHT = 0.5
+
+
+def feature_vector(profile_features: dict) -> np.ndarray:
+    """One matrix row for a features.extract_features() dict. Unknown names are ignored."""
+    import numpy as np
+    row = np.zeros(len(COLUMNS), dtype=np.float32)
+    for name, value in profile_features.get("scores", {}).items():
+        if name in _COLUMN:
+            row[_COLUMN[name]] = value or 0
+    for language, share in profile_features.get("languages", {}).items():
+        column = _COLUMN.get(f"language:{language}")
+        if column is not None:
+            row[column] = min(1.0, share / LANGUAGE_FULL_SHARE)
+    for skill, strength in profile_features.get("skills", {}).items():
+        column = _COLUMN.get(f"skill:{skill}")
+        if column is not None:
+            row[column] = strength
+    return row
+
+
+class MatchQuery:
+    """A job posting as a weight vector over the index columns."""
+    def __init__(self, skills: list, languages: list, description: str = "", title: str = ""):
+        import numpy as np
+        self.skills = {}
+        self.languages = set()
+        self.unrecognized = []
+        for term in skills:
+            skill = features.normalize_skill(term)
+            language = None if skill else features.normalize_language(term)
+            if skill:
+                self.skills[skill] = 1.0
+            elif language:
+                self.languages.add(language) # e.g. "Python" listed under skills
+            else:
+                self.unrecognized.append(term)
+        for term in languages:
+            language = features.normalize_language(term)
+            if language:
+                self.languages.add(language)
+            else:
+                self.unrecognized.append(term)
+        for skill in features.skills_in_text(f"{title} {description}"):
+            self.skills.setdefault(skill, DESCRIPTION_SKILL_WEIGHT)
+
+        parts = {"quality": QUALITY_WEIGHT}
+        if self.skills:
+            parts["skills"] = SKILL_WEIGHT
+        if self.languages:
+            parts["languages"] = LANGUAGE_WEIGHT
+        total = sum(parts.values())
+
+        self.weights = np.zeros(len(COLUMNS), dtype=np.float32)
+        self.weights[SHOWOFF_COLUMN] = parts["quality"] / total / 100
+        if self.skills:
+            skill_total = sum(self.skills.values())
+            for skill, weight in self.skills.items():
+                self.weights[_COLUMN[f"skill:{skill}"]] = parts["skills"] / total * weight / skill_total
+        for language in self.languages:
+            self.weights[_COLUMN[f"language:{language}"]] = parts["languages"] / total / len(self.languages)
+
+
+class FeatureIndex:
+    """
+    All candidates' feature rows, plus which of them opted in. Rows are never
+    removed, only overwritten, so a search can run on a snapshot while the
+    refresher upserts.
+    """
+    def __init__(self, capacity: int = 1024):
+        import numpy as np
+        self._matrix = np.zeros((capacity, len(COLUMNS)), dtype=np.float32)
+        self._opted_in_rows = np.zeros(capacity, dtype=bool)
+        self._opted_in = set()
+        self._user_ids = []
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.stream_id = "0-0" # Last PROFILE_FEATURES_STREAM entry applied
+        self.opted_in_loaded_at = None # time.monotonic() of the last set_opted_in()
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def upsert(self, user_id: str, profile_features: dict):
+        import numpy as np
+        row = feature_vector(profile_features)
+        with self._lock:
+            index = self._rows.get(user_id)
+            if index is None:
+                index = len(self._user_ids)
+                if index == self._matrix.shape[0]:
+                    grown = np.zeros((2 * index, len(COLUMNS)), dtype=np.float32)
+                    grown[:index] = self._matrix
+                    self._matrix = grown
+                    self._opted_in_rows = np.concatenate([self._opted_in_rows, np.zeros(index, dtype=bool)])
+                self._user_ids.append(user_id)
+                self._rows[user_id] = index
+                self._opted_in_rows[index] = user_id in self._opted_in
+            self._matrix[index] = row
+
+    def set_opted_in(self, user_ids: set):
+        """Replaces who opted in (also covers profiles not indexed yet)."""
+        import numpy as np
+        with self._lock:
+            opted_in_rows = np.zeros(self._matrix.shape[0], dtype=bool)
+            for user_id in user_ids:
+                index = self._rows.get(user_id)
+                if index is not None:
+                    opted_in_rows[index] = True
+            self._opted_in = user_ids
+            self._opted_in_rows = opted_in_rows
+            self.opted_in_loaded_at = time.monotonic()
+
+    def search(self, query: MatchQuery, k: int, min_showoff_score: float = 0, opted_in_only: bool = False) -> list:
+        """The best `k` candidates, best first, as (user_id, match_score 0-1, feature row)."""
+        import numpy as np
+        with self._lock:
+            count = len(self._user_ids)
+            matrix = self._matrix[:count]
+            opted_in_rows = self._opted_in_rows[:count]
+            user_ids = self._user_ids
+        if not count:
+            return []
+
+        scores = matrix @ query.weights
+        if min_showoff_score:
+            scores[matrix[:, SHOWOFF_COLUMN] < min_showoff_score] = -np.inf
+        if opted_in_only:
+            scores[~opted_in_rows] = -np.inf
+        wanted = min(k, count)
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(user_ids[i], float(scores[i]), matrix[i]) for i in top if np.isfinite(scores[i])]
+
+
+# --- 1. LOADING + INCREMENTAL REFRESH ---
+_index = None
+
+
+def get_index() -> FeatureIndex | None:
+    """The process-wide index, or None while it is still loading."""
+    return _index
+
+
+def load_index() -> FeatureIndex:
+    """Builds the index from `profiles`. Blocking: run it in a thread."""
+    index = FeatureIndex()
+    # Remember the stream position *before* reading the table: anything
+    # published meanwhile is replayed on top (upserts are idempotent).
+    latest = get_redis().xrevrange(PROFILE_FEATURES_STREAM, count=1)
+    index.stream_id = latest[0][0] if latest else "0-0"
+
+    supabase = get_supabase()
+    start = 0
+    while True:
+        response = supabase.from_("profiles").select("user_id, match_features") \
+            .not_.is_("match_features", "null").order("user_id") \
+            .range(start, start + MATCH_PAGE_SIZE - 1).execute()
+        page = response.data or []
+        for profile in page:
+            index.upsert(profile["user_id"], profile["match_features"])
+        if len(page) < MATCH_PAGE_SIZE:
+            break
+        start += MATCH_PAGE_SIZE
+    if MATCH_REQUIRE_OPT_IN:
+        index.set_opted_in(load_opted_in())
+    print(f"--- [Matching] Index loaded: {len(index)} profiles ---")
+    return index
+
+
+def load_opted_in() -> set:
+    """Every user_id with profiles.b2b_opt_in set. Blocking: run it in a thread."""
+    supabase = get_supabase()
+    opted_in = set()
+    start = 0
+    while True:
+        response = supabase.from_("profiles").select("user_id").eq("b2b_opt_in", True) \
+            .order("user_id").range(start, start + MATCH_PAGE_SIZE - 1).execute()
+        page = response.data or []
+        opted_in.update(profile["user_id"] for profile in page)
+        if len(page) < MATCH_PAGE_SIZE:
+            return opted_in
+        start += MATCH_PAGE_SIZE
+
+
+def _apply_updates(index: FeatureIndex) -> int:
+    """Blocks up to MATCH_REFRESH_BLOCK_MS for new features; returns how many were applied."""
+    response = get_redis().xread({PROFILE_FEATURES_STREAM: index.stream_id}, count=500, block=MATCH_REFRESH_BLOCK_MS)
+    applied = 0
+    for _stream, entries in response or []:
+        for entry_id, data in entries:
+            try:
+                index.upsert(data["user_id"], json.loads(data["features"]))
+                applied += 1
+            except (KeyError, json.JSONDecodeError):
+                print(f"--- [Matching] Skipping malformed entry {entry_id} ---")
+            index.stream_id = entry_id
+    return applied
+
+
+async def refresh_forever():
+    """
+    Loads the index, then applies new features as the worker publishes them
+    and re-reads the opt-in set every MATCH_OPT_IN_REFRESH_SECONDS. Runs for the life of the API process (started in main.py's lifespan).
+    After an error it reloads from scratch, in case entries were missed.
+    """
+    global _index
+    if not get_redis():
+        print("--- [Matching] REDIS_URL not set: job matching is disabled ---")
+        return
+    index = None
+    while True:
+        try:
+            if index is None:
+                index = await asyncio.to_thread(load_index)
+                _index = index
+            await asyncio.to_thread(_apply_updates, index)
+            if MATCH_REQUIRE_OPT_IN and time.monotonic() - index.opted_in_loaded_at >= MATCH_OPT_IN_REFRESH_SECONDS:
+                index.set_opted_in(await asyncio.to_thread(load_opted_in))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"--- [Matching] ERROR refreshing index (retrying in {MATCH_RETRY_SECONDS}s): {e} ---")
+            index = None # Keep serving the old one until the reload succeeds
+            await asyncio.sleep(MATCH_RETRY_SECONDS)
+
+
+# --- 2. RANKING ---
+def _explain(query: MatchQuery, row: np.ndarray) -> dict:
+    return {
+        "resume_score": float(row[_COLUMN["resume"]]),
+        "github_score": float(row[_COLUMN["github"]]),
+        "showoff_score": round(float(row[SHOWOFF_COLUMN]), 2),
+        "matched_skills": sorted(s for s in query.skills if row[_COLUMN[f"skill:{s}"]] > 0),
+        "missing_skills": sorted(s for s in query.skills if row[_COLUMN[f"skill:{s}"]] == 0),
+        "matched_languages": sorted(l for l in query.languages if row[_COLUMN[f"language:{l}"]] > 0),
+    }
+
+
+def rank_candidates(index: FeatureIndex, query: MatchQuery, top_k: int, min_showoff_score: float = 0) -> list:
+    """
+    The `top_k` best-matching candidates, best first. With
+    MATCH_REQUIRE_OPT_IN (the default) only candidates in the index's cached
+    opt-in set are eligible; without it every indexed profile is.
+    """
+    hits = index.search(query, top_k, min_showoff_score, opted_in_only=MATCH_REQUIRE_OPT_IN)
+    return [
+        {"user_id": user_id, "match_score": round(score * 100, 1), **_explain(query, row)}
+        for user_id, score, row in hits
+    ]
@@ -0,0 +1,43 @@
+-- Append-only history of every score the worker produces.
+-- One row per (user, component, input, rubric version, model): re-scoring
+-- the same input with the same rubric and model reuses the recorded result
+-- instead of calling the LLM again, and a rubric change shows up as rows
+-- whose rubric_version differs from the worker's current one.
+--
+-- Apply in the Supabase SQL editor (or `psql "$DATABASE_URL" -f ...`).
+
+create table if not exists public.score_history (
+    id              bigint generated always as identity primary key,
+    user_id         uuid        not null,
+    component       text        not null check (component in ('resume', 'github')),
+    input_hash      text        not null, -- sha256 of the resume PDF / GitHub context packet
+    rubric_version  text        not null, -- e.g. MASTER_PROMPT_V5@1a2b3c4d (prompt name @ content hash)
+    model           text        not null, -- e.g. gemini-3-pro-preview
+    score           numeric     not null,
+    justification   text,
+    feedback        text,
+    github_username text,                 -- inputs, so stale rows can be re-queued as-is
+    resume_path     text,
+    created_at      timestamptz not null default now()
+);
+
+create unique index if not exists score_history_lookup_idx
+    on public.score_history (user_id, component, input_hash, rubric_version, model);
+
+create index if not exists score_history_user_trend_idx
+    on public.score_history (user_id, created_at desc);
+
+create index if not exists score_history_rubric_idx
+    on public.score_history (component, rubric_version, model);
+
+-- Append-only: the service role may insert and read, never update or delete.
+alter table public.score_history enable row level security;
+revoke update, delete on public.score_history from anon, authenticated, service_role;
+
+-- Most recent score per user and component (dashboards, stale-row targeting).
+create or replace view public.latest_scores as
+select distinct on (user_id, component)
+    user_id, component, input_hash, rubric_version, model, score,
+    github_username, resume_path, created_at
+from public.score_history
+order by user_id, component, created_at desc;
@@ -0,0 +1,14 @@
+-- Content-addressed resume storage (see blob_store.py).
+-- Resume PDFs live once per SHA-256 at resumes/blobs/{sha[:2]}/{sha}.pdf;
+-- each profile points at its current resume through these columns.
+--
+-- Apply in the Supabase SQL editor (or `psql "$DATABASE_URL" -f ...`).
+
+alter table public.profiles
+    add column if not exists resume_blob_sha256 text,
+    add column if not exists resume_filename    text;
+
+-- The blob garbage collector scans every referenced hash.
+create index if not exists profiles_resume_blob_idx
+    on public.profiles (resume_blob_sha256)
+    where resume_blob_sha256 is not null;
@@ -0,0 +1,22 @@
+-- Compact per-candidate features for recruiter job matching (see features.py).
+-- Written by the worker through the profile write-behind buffer after each
+-- complete analysis; every API process loads them into its in-memory match
+-- index (matching.py) at startup.
+--
+-- Apply in the Supabase SQL editor (or `psql "$DATABASE_URL" -f ...`).
+
+alter table public.profiles
+    add column if not exists match_features jsonb,
+    -- Recruiter discovery opt-in (the toggle on DashboardPage.jsx). With
+    -- MATCH_REQUIRE_OPT_IN (the default) only these candidates are matched.
+    add column if not exists b2b_opt_in boolean not null default false;
+
+-- The index load pages through every profile that has features.
+create index if not exists profiles_match_features_idx
+    on public.profiles (user_id)
+    where match_features is not null;
+
+-- ...and the opt-in set is re-read every MATCH_OPT_IN_REFRESH_SECONDS.
+create index if not exists profiles_b2b_opt_in_idx
+    on public.profiles (user_id)
+    where b2b_opt_in;
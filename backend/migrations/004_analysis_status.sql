@@ -0,0 +1,13 @@
+-- Outcome of the latest profile analysis, so the app can stop waiting on a
+-- job that was given up on (dead-lettered, see dead_letters.py).
+--   processing: set by the API when a resume is submitted
+--   complete:   set by the worker with the scores
+--   failed:     set by the worker when the job is dead-lettered;
+--               analysis_error holds a message for the candidate
+--
+-- Apply in the Supabase SQL editor (or `psql "$DATABASE_URL" -f ...`).
+
+alter table public.profiles
+    add column if not exists analysis_status text
+        check (analysis_status in ('processing', 'complete', 'failed')),
+    add column if not exists analysis_error  text;
@@ -0,0 +1,36 @@
+-- Bulk UPDATE for the profile write-behind buffer (see score_writer.py).
+-- A PostgREST upsert runs as INSERT ... ON CONFLICT DO UPDATE, and Postgres
+-- checks NOT NULL on the proposed *insert* row before it resolves the
+-- conflict, so partial score rows fail on any NOT NULL column without a
+-- default (e.g. email). This function only ever updates existing rows, in
+-- one statement per flush.
+--
+-- updates: [{"user_id": "...", "fields": {column: value, ...}}, ...]
+-- Columns missing from "fields" keep their value. Returns the updated user_ids.
+-- A new column the worker writes must be added to the SET list.
+--
+-- Apply in the Supabase SQL editor (or `psql "$DATABASE_URL" -f ...`).
+
+create or replace function public.update_profiles(updates jsonb)
+returns setof uuid
+language sql
+as $$
+    update public.profiles as p
+    set (resume_score, resume_justification, resume_feedback,
+         github_score, github_justification, github_feedback,
+         showoff_score, match_features,
+         analysis_status, analysis_error) = (
+        select r.resume_score, r.resume_justification, r.resume_feedback,
+               r.github_score, r.github_justification, r.github_feedback,
+               r.showoff_score, r.match_features,
+               r.analysis_status, r.analysis_error
+        from jsonb_populate_record(p, u.item -> 'fields') as r
+    )
+    from jsonb_array_elements(updates) as u(item)
+    where p.user_id = (u.item ->> 'user_id')::uuid
+    returning p.user_id;
+$$;
+
+-- Server-side only (the worker uses the service role key)
+revoke execute on function public.update_profiles(jsonb) from public, anon, authenticated;
+grant execute on function public.update_profiles(jsonb) to service_role;
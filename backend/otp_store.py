@@ -0,0 +1,171 @@
+import os
+import hashlib
+from functools import lru_cache
+from clients import get_redis
+
+# --- COLLEGE OTP STORE (ATOMIC, RATE-LIMITED) ---
+# Issue and verify are each ONE Redis round-trip: a Lua script does the
+# rate-limit checks, cooldown, attempt counting and OTP write/compare
+# atomically, so concurrent requests can never race past a limit.
+#
+# Keys (email is lower-cased; domain is the registered college domain, so
+# every subdomain of a college shares one per-domain limit):
+#   college_otp:{email}          HASH  otp_hash, college_name, attempts (expires with the OTP)
+#   college_otp:cooldown:{email} STRING set on issue, blocks re-sends for OTP_COOLDOWN_SECONDS
+#   college_otp:rl:email:{email} ZSET  sliding window of send timestamps (ms), one per scope
+#   college_otp:rl:domain:{domain}
+#   college_otp:rl:ip:{ip}
+
+OTP_PREFIX = "college_otp:"
+OTP_TTL_SECONDS = int(os.environ.get("OTP_TTL_SECONDS", "600"))
+OTP_COOLDOWN_SECONDS = int(os.environ.get("OTP_COOLDOWN_SECONDS", "60"))
+OTP_MAX_ATTEMPTS = int(os.environ.get("OTP_MAX_ATTEMPTS", "5"))
+OTP_RATE_WINDOW_SECONDS = int(os.environ.get("OTP_RATE_WINDOW_SECONDS", "3600"))
+OTP_MAX_SENDS_PER_EMAIL = int(os.environ.get("OTP_MAX_SENDS_PER_EMAIL", "5"))
+OTP_MAX_SENDS_PER_DOMAIN = int(os.environ.get("OTP_MAX_SENDS_PER_DOMAIN", "300"))
+OTP_MAX_SENDS_PER_IP = int(os.environ.get("OTP_MAX_SENDS_PER_IP", "20"))
+
+
+def validate_config():
+    """Raises ValueError for settings the scripts below cannot work with (called at API startup)."""
+    minimums = {
+        "OTP_TTL_SECONDS": (OTP_TTL_SECONDS, 1),
+        "OTP_COOLDOWN_SECONDS": (OTP_COOLDOWN_SECONDS, 0),
+        "OTP_MAX_ATTEMPTS": (OTP_MAX_ATTEMPTS, 1),
+        "OTP_RATE_WINDOW_SECONDS": (OTP_RATE_WINDOW_SECONDS, 1),
+        "OTP_MAX_SENDS_PER_EMAIL": (OTP_MAX_SENDS_PER_EMAIL, 1),
+        "OTP_MAX_SENDS_PER_DOMAIN": (OTP_MAX_SENDS_PER_DOMAIN, 1),
+        "OTP_MAX_SENDS_PER_IP": (OTP_MAX_SENDS_PER_IP, 1),
+    }
+    invalid = [f"{name}={value} (must be >= {minimum})" for name, (value, minimum) in minimums.items() if value < minimum]
+    if invalid:
+        raise ValueError(f"Invalid OTP settings: {', '.join(invalid)}")
+
+
+# Returns {"ok"} | {"cooldown", retry_ms} | {"rate_limited", scope, retry_ms}
+_ISSUE_LUA = """
+local otp_key, cooldown_key = KEYS[1], KEYS[2]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[5])
+local member = ARGV[6]
+
+local cooldown_ms = redis.call('PTTL', cooldown_key)
+if cooldown_ms > 0 then
+    return {'cooldown', cooldown_ms}
+end
+
+local scopes = {'email', 'domain', 'ip'}
+for i = 3, 5 do
+    local limit = tonumber(ARGV[4 + i])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[i]) >= limit then
+        local oldest = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+        return {'rate_limited', scopes[i - 2], tonumber(oldest[2]) + window - now}
+    end
+end
+
+for i = 3, 5 do
+    redis.call('ZADD', KEYS[i], now, member)
+    redis.call('PEXPIRE', KEYS[i], window)
+end
+redis.call('DEL', otp_key)
+redis.call('HSET', otp_key, 'otp_hash', ARGV[2], 'college_name', ARGV[3], 'attempts', 0)
+redis.call('EXPIRE', otp_key, tonumber(ARGV[4]))
+if tonumber(ARGV[10]) > 0 then -- 0 disables the cooldown (SET ... EX 0 is an error)
+    redis.call('SET', cooldown_key, 1, 'EX', tonumber(ARGV[10]))
+end
+return {'ok'}
+"""
+
+# Returns {"ok", college_name} | {"missing"} | {"locked"} | {"mismatch", attempts_left}
+_VERIFY_LUA = """
+local otp_key = KEYS[1]
+local stored = redis.call('HGET', otp_key, 'otp_hash')
+if not stored then
+    return {'missing'}
+end
+if stored == ARGV[1] then
+    local college_name = redis.call('HGET', otp_key, 'college_name')
+    redis.call('DEL', otp_key)
+    return {'ok', college_name}
+end
+local attempts = redis.call('HINCRBY', otp_key, 'attempts', 1)
+local max_attempts = tonumber(ARGV[2])
+if attempts >= max_attempts then
+    redis.call('DEL', otp_key)
+    return {'locked'}
+end
+return {'mismatch', max_attempts - attempts}
+"""
+
+
+@lru_cache(maxsize=None)
+def _scripts():
+    # register_script() runs EVALSHA and only falls back to loading the
+    # script when Redis has not seen it yet.
+    redis_client = get_redis()
+    return redis_client.register_script(_ISSUE_LUA), redis_client.register_script(_VERIFY_LUA)
+
+
+def _otp_key(email: str) -> str:
+    return f"{OTP_PREFIX}{email}"
+
+
+def _cooldown_key(email: str) -> str:
+    return f"{OTP_PREFIX}cooldown:{email}"
+
+
+def _hash_otp(email: str, otp: str) -> str:
+    # Never store the code itself
+    return hashlib.sha256(f"{email}:{otp}".encode()).hexdigest()
+
+
+def issue_otp(email: str, otp: str, college_name: str, college_domain: str, client_ip: str, now_ms: int) -> tuple:
+    """
+    Stores a new OTP for `email` if no cooldown or rate limit applies.
+    `college_domain` is the registered domain the email matched
+    (CollegeRegistry.match_email), which the per-domain limit is keyed on.
+    Returns ("ok",), ("cooldown", retry_ms) or ("rate_limited", scope, retry_ms).
+    """
+    email = email.lower()
+    issue_script, _verify_script = _scripts()
+    result = issue_script(
+        keys=[
+            _otp_key(email),
+            _cooldown_key(email),
+            f"{OTP_PREFIX}rl:email:{email}",
+            f"{OTP_PREFIX}rl:domain:{college_domain}",
+            f"{OTP_PREFIX}rl:ip:{client_ip}",
+        ],
+        args=[
+            now_ms,
+            _hash_otp(email, otp),
+            college_name,
+            OTP_TTL_SECONDS,
+            OTP_RATE_WINDOW_SECONDS * 1000,
+            f"{now_ms}:{_hash_otp(email, otp)[:12]}", # Unique window member per send
+            OTP_MAX_SENDS_PER_EMAIL,
+            OTP_MAX_SENDS_PER_DOMAIN,
+            OTP_MAX_SENDS_PER_IP,
+            OTP_COOLDOWN_SECONDS,
+        ],
+    )
+    return tuple(result)
+
+
+def verify_otp(email: str, otp: str) -> tuple:
+    """
+    Checks `otp` and consumes it on success. Every wrong guess counts;
+    the OTP is deleted after OTP_MAX_ATTEMPTS wrong guesses.
+    Returns ("ok", college_name), ("missing",), ("locked",) or ("mismatch", attempts_left).
+    """
+    email = email.lower()
+    _issue_script, verify_script = _scripts()
+    result = verify_script(keys=[_otp_key(email)], args=[_hash_otp(email, otp), OTP_MAX_ATTEMPTS])
+    return tuple(result)
+
+
+def discard_otp(email: str):
+    """Drops the OTP and its cooldown (e.g. the email could not be sent)."""
+    email = email.lower()
+    get_redis().delete(_otp_key(email), _cooldown_key(email))
@@ -0,0 +1,49 @@
+import os
+from functools import lru_cache
+import batches
+from clients import REDIS_URL
+
+# --- TASK PRODUCER (API SIDE) ---
+# The API only ever *sends* jobs. It never needs the worker's prompts,
+# the Gemini SDK, or the task bodies, so it talks to the broker through
+# this bare Celery app and addresses tasks by name.
+
+RUN_DEEP_ANALYSIS = "run_deep_analysis" # Must match the task names in worker.py
+RUN_BATCH_ITEM = "run_batch_item"
+
+# Max jobs of one recruiter batch running at once. A batch runs as a sliding
+# window of this size: each finished item starts the next one.
+BATCH_FANOUT = int(os.environ.get("BATCH_FANOUT", "8"))
+
+
+@lru_cache(maxsize=None)
+def get_celery_app():
+    """
+    Returns a producer-only Celery app. Celery is imported on first use,
+    so it does not count against the API's import time.
+    """
+    from celery import Celery
+    return Celery("tasks", broker=REDIS_URL, backend=REDIS_URL)
+
+
+def send_deep_analysis(user_id: str, github_username: str, resume_path: str):
+    """Queues one "run_deep_analysis" job for the worker."""
+    return get_celery_app().send_task(
+        RUN_DEEP_ANALYSIS,
+        args=[user_id, github_username, resume_path]
+    )
+
+
+def send_batch(batch_id: str, items: dict):
+    """
+    Queues a recruiter batch: `items` maps item_id -> (github_username, resume_path).
+    The items wait in a Redis list (batches.queue_items); the first
+    BATCH_FANOUT are sent now, and every item the worker finishes sends the
+    next one, so BATCH_FANOUT stay in flight until the list runs dry (one
+    slow item no longer holds up a whole wave). The last item to finish
+    sends "finalize_batch".
+    """
+    batches.queue_items(batch_id, items)
+    app = get_celery_app()
+    for item_id, github_username, resume_path in batches.pop_next(batch_id, BATCH_FANOUT):
+        app.send_task(RUN_BATCH_ITEM, args=[batch_id, item_id, github_username, resume_path])
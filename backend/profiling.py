@@ -0,0 +1,186 @@
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from clients import get_redis
+
+# --- PER-PHASE JOB PROFILING ---
+# profile_job() wraps one Celery job; phase() marks a unit of work inside it
+# (storage download, one Gemini call, one GitHub endpoint class, ...). Every
+# phase records wall time, bytes moved and call count. Jobs slower than
+# SLOW_JOB_THRESHOLD_SECONDS get their full breakdown (plus an optional
+# cProfile dump) persisted to Redis, where GET /admin/slow_jobs lists them.
+#
+# The active profiler lives in a ContextVar, so helpers deep in the GitHub
+# scraper can call phase() without a profiler being threaded through, and
+# concurrent gevent greenlets each see their own job.
+
+SLOW_JOB_THRESHOLD_SECONDS = float(os.environ.get("SLOW_JOB_THRESHOLD_SECONDS", "90"))
+# cProfile is process-wide, so only one job at a time can be profiled this way.
+# It is skipped under gevent (the production pool): it would also count every
+# other greenlet that runs while the profiled job waits on I/O. Use it with
+# the prefork or solo pool (e.g. `celery -A worker.celery_app worker -P solo`).
+SLOW_JOB_CPROFILE = os.environ.get("SLOW_JOB_CPROFILE", "0") == "1"
+SLOW_JOB_KEEP = int(os.environ.get("SLOW_JOB_KEEP", "200"))
+SLOW_JOB_TTL_SECONDS = int(os.environ.get("SLOW_JOB_TTL_SECONDS", str(7 * 24 * 3600)))
+SLOW_JOB_PROFILE_LINES = 40
+
+SLOW_JOBS_KEY = "slow_jobs" # ZSET: job_id -> total seconds
+SLOW_JOB_PREFIX = "slow_job:" # STRING: JSON breakdown, expires after SLOW_JOB_TTL_SECONDS
+
+_current_profiler = contextvars.ContextVar("job_profiler", default=None)
+_cprofile_busy = False
+_warned_gevent = False
+
+
+class PhaseStats:
+    __slots__ = ("wall_seconds", "bytes", "calls")
+
+    def __init__(self):
+        self.wall_seconds = 0.0
+        self.bytes = 0
+        self.calls = 0
+
+    def add_bytes(self, n: int):
+        self.bytes += n
+
+    def as_dict(self) -> dict:
+        return {"wall_seconds": round(self.wall_seconds, 3), "bytes": self.bytes, "calls": self.calls}
+
+
+class JobProfiler:
+    def __init__(self, job_id: str, task_name: str, meta: dict):
+        self.job_id = job_id
+        self.task_name = task_name
+        self.meta = meta
+        self.phases = {}
+        self.started_at = time.time()
+        self.total_seconds = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        stats = self.phases.setdefault(name, PhaseStats())
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_seconds += time.perf_counter() - start
+            stats.calls += 1
+
+    def breakdown(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "task": self.task_name,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec="seconds"),
+            "total_seconds": round(self.total_seconds, 3),
+            **self.meta,
+            "phases": {name: stats.as_dict() for name, stats in self.phases.items()},
+        }
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Times `name` inside the current job. Yields a PhaseStats so the caller
+    can add_bytes(); outside of a job it is a no-op.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield PhaseStats()
+        return
+    with profiler.phase(name) as stats:
+        yield stats
+
+
+def _format_cprofile(profile: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(SLOW_JOB_PROFILE_LINES)
+    return out.getvalue()
+
+
+def _persist_slow_job(breakdown: dict):
+    redis_client = get_redis()
+    if not redis_client:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(f"{SLOW_JOB_PREFIX}{breakdown['job_id']}", json.dumps(breakdown), ex=SLOW_JOB_TTL_SECONDS)
+    pipe.zadd(SLOW_JOBS_KEY, {breakdown["job_id"]: breakdown["total_seconds"]})
+    pipe.zremrangebyrank(SLOW_JOBS_KEY, 0, -(SLOW_JOB_KEEP + 1)) # Keep only the slowest N
+    pipe.execute()
+
+
+def _under_gevent() -> bool:
+    """True in a gevent-patched process (celery -P gevent patches at startup)."""
+    if "gevent" not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched("threading")
+
+
+def _cprofile_allowed() -> bool:
+    global _warned_gevent
+    if not SLOW_JOB_CPROFILE or _cprofile_busy:
+        return False
+    if _under_gevent():
+        if not _warned_gevent:
+            _warned_gevent = True
+            print("--- [Profile] SLOW_JOB_CPROFILE ignored: cProfile would mix greenlets under gevent ---")
+        return False
+    return True
+
+
+@contextmanager
+def profile_job(job_id: str, task_name: str, **meta):
+    """Profiles one job. Persists the breakdown if it ran over the threshold."""
+    global _cprofile_busy
+    profiler = JobProfiler(job_id, task_name, meta)
+    token = _current_profiler.set(profiler)
+
+    cprofile = None
+    if _cprofile_allowed():
+        _cprofile_busy = True
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    start = time.perf_counter()
+    try:
+        yield profiler
+    finally:
+        profiler.total_seconds = time.perf_counter() - start
+        if cprofile:
+            cprofile.disable()
+            _cprofile_busy = False
+        _current_profiler.reset(token)
+
+        breakdown = profiler.breakdown()
+        summary = ", ".join(f"{name}={s['wall_seconds']}s" for name, s in breakdown["phases"].items())
+        if breakdown["phases"]: # Not for jobs with no timed work (e.g. an idle flush)
+            print(f"--- [Profile] {task_name} {job_id} took {breakdown['total_seconds']}s ({summary}) ---")
+
+        if profiler.total_seconds >= SLOW_JOB_THRESHOLD_SECONDS:
+            if cprofile:
+                breakdown["cprofile"] = _format_cprofile(cprofile)
+            try:
+                _persist_slow_job(breakdown)
+                print(f"--- [Profile] SLOW JOB recorded: {job_id} ---")
+            except Exception as e:
+                print(f"--- [Profile] ERROR recording slow job: {e} ---")
+
+
+def list_slow_jobs(limit: int = 20) -> list:
+    """Returns the slowest recorded jobs (slowest first) whose breakdowns have not expired."""
+    redis_client = get_redis()
+    job_ids = redis_client.zrevrange(SLOW_JOBS_KEY, 0, limit - 1)
+    if not job_ids:
+        return []
+    records = redis_client.mget([f"{SLOW_JOB_PREFIX}{job_id}" for job_id in job_ids])
+    expired = [job_id for job_id, record in zip(job_ids, records) if record is None]
+    if expired:
+        redis_client.zrem(SLOW_JOBS_KEY, *expired)
+    return [json.loads(record) for record in records if record is not None]
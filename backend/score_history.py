@@ -0,0 +1,75 @@
+import hashlib
+from clients import get_supabase
+from score_writer import enqueue_history_row
+
+# --- SCORE HISTORY (APPEND-ONLY) ---
+# Every LLM score is recorded in `score_history` (migrations/001_score_history.sql),
+# keyed by (user, component, input hash, rubric version, model).
+# - Before calling the LLM, the worker looks the key up and reuses a hit.
+# - Rows whose rubric_version/model differ from the worker's current ones
+#   are stale; rescore_stale.py re-queues exactly those users.
+# Rows are written through the profile write-behind buffer (score_writer.py).
+
+
+def rubric_version(prompt_name: str, prompt: str) -> str:
+    """'<PROMPT_NAME>@<hash of its text>': changes whenever the prompt text does."""
+    return f"{prompt_name}@{hashlib.sha256(prompt.encode()).hexdigest()[:8]}"
+
+
+def input_hash(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def lookup(user_id: str, component: str, input_digest: str, rubric: str, model: str) -> dict | None:
+    """Returns the recorded result for this exact key as an LLM-shaped dict, or None."""
+    response = get_supabase().from_("score_history").select("score, justification, feedback") \
+        .eq("user_id", user_id).eq("component", component).eq("input_hash", input_digest) \
+        .eq("rubric_version", rubric).eq("model", model).limit(1).execute()
+    if not response.data:
+        return None
+    row = response.data[0]
+    return {
+        "total_score_100": row["score"],
+        "justification": row["justification"],
+        "actionable_feedback": row["feedback"],
+    }
+
+
+def record(user_id: str, component: str, input_digest: str, rubric: str, model: str,
+           result: dict, github_username: str, resume_path: str):
+    """Buffers one history row for `result` (an LLM score dict)."""
+    enqueue_history_row({
+        "user_id": user_id,
+        "component": component,
+        "input_hash": input_digest,
+        "rubric_version": rubric,
+        "model": model,
+        "score": result.get("total_score_100", 0),
+        "justification": result.get("justification"),
+        "feedback": result.get("actionable_feedback"),
+        "github_username": github_username,
+        "resume_path": resume_path,
+    })
+
+
+def stale_rows(current: dict, page_size: int = 1000):
+    """
+    Yields `latest_scores` rows whose rubric_version or model differs from
+    `current`, a {component: (rubric_version, model)} map.
+    """
+    supabase = get_supabase()
+    for component, (rubric, model) in current.items():
+        start = 0
+        while True:
+            response = supabase.from_("latest_scores") \
+                .select("user_id, component, rubric_version, model, github_username, resume_path") \
+                .eq("component", component) \
+                .or_(f"rubric_version.neq.{rubric},model.neq.{model}") \
+                .order("user_id").range(start, start + page_size - 1).execute()
+            page = response.data or []
+            yield from page
+            if len(page) < page_size:
+                break
+            start += page_size
@@ -0,0 +1,308 @@
+import os
+import json
+import socket
+import profiling
+from clients import get_redis, get_supabase
+
+# --- WRITE-BEHIND BUFFER FOR PROFILE SCORES ---
+# Finished jobs no longer PATCH `profiles` one row at a time. They append
+# their update to a Redis stream, and a flush drains the stream in batches:
+#   1. coalesce updates per user (last write wins, field by field)
+#   2. drop updates for profiles that no longer exist (updates never create rows)
+#   3. update the leaderboard sorted set (ranks are served from it, never
+#      stored: one new score shifts everyone below it)
+#   4. one bulk UPDATE of the existing `profiles` rows per batch (the
+#      update_profiles() SQL function, migrations/005_update_profiles.sql)
+#   5. one bulk insert of the batch's `score_history` rows (see score_history.py)
+#   6. XACK + XDEL the entries that were written
+# If a bulk write fails, its rows are retried one at a time, so one bad row
+# never holds back the rest of the batch; profile and history rows are acked
+# independently. An entry is only acked after its row was written. Entries
+# read by a worker that died mid-flush, or whose row failed, stay pending and
+# are reclaimed by a later flush; after FLUSH_MAX_DELIVERIES attempts they are
+# moved to PROFILE_UPDATES_DLQ (re-XADD them to the buffer to replay them).
+# Flushes are triggered by size (enqueue_profile_update) and by time
+# (the "flush_profile_updates" beat task in worker.py). Their PostgREST calls
+# are timed as supabase.* phases (profiling.py) of whichever job ran the flush.
+
+PROFILE_UPDATES_STREAM = "profile_updates"
+PROFILE_WRITERS_GROUP = "profile_writers"
+FLUSH_LOCK_KEY = "profile_updates:flush_lock"
+LEADERBOARD_KEY = "leaderboard:showoff"
+# Unique key of a score_history row (see migrations/001_score_history.sql)
+HISTORY_CONFLICT_COLUMNS = "user_id,component,input_hash,rubric_version,model"
+PROFILE_UPDATES_DLQ = "profile_updates_dlq"
+
+FLUSH_BATCH_SIZE = int(os.environ.get("PROFILE_FLUSH_BATCH_SIZE", "200"))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("PROFILE_FLUSH_INTERVAL_SECONDS", "5"))
+FLUSH_MAX_BATCHES = int(os.environ.get("PROFILE_FLUSH_MAX_BATCHES", "20"))
+# Entries pending longer than this belong to a dead (or stuck) flusher.
+RECLAIM_IDLE_MS = int(os.environ.get("PROFILE_FLUSH_RECLAIM_IDLE_MS", "60000"))
+FLUSH_MAX_DELIVERIES = int(os.environ.get("PROFILE_FLUSH_MAX_DELIVERIES", "5"))
+
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _ensure_group(redis_client):
+    try:
+        redis_client.xgroup_create(PROFILE_UPDATES_STREAM, PROFILE_WRITERS_GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _enqueue(entry: dict):
+    redis_client = get_redis()
+    redis_client.xadd(PROFILE_UPDATES_STREAM, entry)
+    if redis_client.xlen(PROFILE_UPDATES_STREAM) >= FLUSH_BATCH_SIZE:
+        flush_profile_updates()
+
+
+def enqueue_profile_update(user_id: str, fields: dict):
+    """
+    Buffers a `profiles` update for `user_id`.
+    Flushes right away once a full batch is waiting.
+    """
+    _enqueue({"kind": "profile", "user_id": user_id, "fields": json.dumps(fields)})
+
+
+def enqueue_history_row(row: dict):
+    """Buffers one append-only `score_history` row."""
+    _enqueue({"kind": "history", "user_id": row["user_id"], "fields": json.dumps(row)})
+
+
+def _read_batch(redis_client) -> list:
+    """Reclaims stale pending entries first, then reads new ones."""
+    _next_id, entries, *_ = redis_client.xautoclaim(
+        PROFILE_UPDATES_STREAM, PROFILE_WRITERS_GROUP, CONSUMER_NAME,
+        min_idle_time=RECLAIM_IDLE_MS, start_id="0-0", count=FLUSH_BATCH_SIZE
+    )
+    entries = [(entry_id, data) for entry_id, data in entries if data]
+    if len(entries) < FLUSH_BATCH_SIZE:
+        response = redis_client.xreadgroup(
+            PROFILE_WRITERS_GROUP, CONSUMER_NAME, {PROFILE_UPDATES_STREAM: ">"},
+            count=FLUSH_BATCH_SIZE - len(entries)
+        )
+        for _stream, stream_entries in response or []:
+            entries.extend(stream_entries)
+    return entries
+
+
+def _coalesce(entries: list) -> tuple[dict, list, list]:
+    """
+    Merges profile updates per user in stream order; history rows are kept as-is.
+    Returns ({user_id: (fields, entry_ids)}, [(history_row, entry_id)], malformed entry_ids).
+    """
+    rows = {}
+    history_rows = []
+    malformed = []
+    for entry_id, data in entries:
+        try:
+            fields = json.loads(data["fields"])
+        except (KeyError, json.JSONDecodeError):
+            print(f"--- [ScoreWriter] Dropping malformed entry {entry_id} ---")
+            malformed.append(entry_id)
+            continue
+        if data.get("kind") == "history":
+            history_rows.append((fields, entry_id))
+        else:
+            merged, entry_ids = rows.setdefault(data["user_id"], ({}, []))
+            merged.update(fields)
+            entry_ids.append(entry_id)
+    return rows, history_rows, malformed
+
+
+def rebuild_leaderboard(page_size: int = 1000):
+    """Backfills the leaderboard sorted set from `profiles`."""
+    redis_client = get_redis()
+    supabase = get_supabase()
+    start = 0
+    while True:
+        response = supabase.from_("profiles").select("user_id, showoff_score") \
+            .not_.is_("showoff_score", "null").order("user_id") \
+            .range(start, start + page_size - 1).execute()
+        page = response.data or []
+        if page:
+            redis_client.zadd(LEADERBOARD_KEY, {p["user_id"]: p["showoff_score"] for p in page})
+        if len(page) < page_size:
+            break
+        start += page_size
+    print(f"--- [ScoreWriter] Leaderboard rebuilt ({redis_client.zcard(LEADERBOARD_KEY)} profiles) ---")
+
+
+def _apply_leaderboard(redis_client, rows: dict):
+    """Adds the flushed users' new showoff scores to the leaderboard."""
+    scored = {user_id: fields["showoff_score"] for user_id, fields in rows.items() if "showoff_score" in fields}
+    if not scored:
+        return
+    if not redis_client.exists(LEADERBOARD_KEY):
+        rebuild_leaderboard()
+    redis_client.zadd(LEADERBOARD_KEY, scored)
+
+
+def leaderboard_rank(user_id: str) -> dict:
+    """{"rank": 1-based rank or None if unscored, "total": scored profiles}."""
+    redis_client = get_redis()
+    if not redis_client.exists(LEADERBOARD_KEY):
+        rebuild_leaderboard()
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrank(LEADERBOARD_KEY, user_id)
+    pipe.zcard(LEADERBOARD_KEY)
+    rank, total = pipe.execute()
+    return {"rank": None if rank is None else rank + 1, "total": total}
+
+
+def _existing_profiles(user_ids: list) -> set:
+    response = get_supabase().from_("profiles").select("user_id").in_("user_id", user_ids).execute()
+    return {profile["user_id"] for profile in response.data or []}
+
+
+def _update_profiles(rows: dict) -> set:
+    """
+    Writes rows of profiles known to exist in one bulk UPDATE (never an
+    upsert: NOT NULL columns would reject the partial insert row), falling
+    back to one UPDATE per row if it fails. Returns the user_ids written.
+    """
+    updates = [{"user_id": user_id, "fields": fields} for user_id, fields in rows.items()]
+    try:
+        response = get_supabase().rpc("update_profiles", {"updates": updates}).execute()
+        return {str(user_id) for user_id in response.data or []}
+    except Exception as e:
+        print(f"--- [ScoreWriter] ERROR in bulk profile write, retrying row by row: {e} ---")
+    written = set()
+    for user_id, fields in rows.items():
+        try:
+            get_supabase().from_("profiles").update(fields).eq("user_id", user_id).execute()
+            written.add(user_id)
+        except Exception as e:
+            print(f"--- [ScoreWriter] ERROR writing profile {user_id}: {e} ---")
+    return written
+
+
+def _insert_history(history_rows: list) -> list:
+    """
+    Appends history rows; a row already recorded for the same key is skipped,
+    never updated. Falls back to one row at a time if the bulk write fails.
+    Takes and returns [(row, entry_id)] (the written ones).
+    """
+    def insert(rows):
+        get_supabase().from_("score_history").upsert(
+            rows, on_conflict=HISTORY_CONFLICT_COLUMNS, ignore_duplicates=True
+        ).execute()
+
+    try:
+        insert([row for row, _entry_id in history_rows])
+        return history_rows
+    except Exception as e:
+        print(f"--- [ScoreWriter] ERROR in bulk history write, retrying row by row: {e} ---")
+    written = []
+    for row, entry_id in history_rows:
+        try:
+            insert([row])
+            written.append((row, entry_id))
+        except Exception as e:
+            print(f"--- [ScoreWriter] ERROR writing history row {entry_id}: {e} ---")
+    return written
+
+
+def _ack(redis_client, entry_ids: list):
+    if not entry_ids:
+        return
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.xack(PROFILE_UPDATES_STREAM, PROFILE_WRITERS_GROUP, *entry_ids)
+    pipe.xdel(PROFILE_UPDATES_STREAM, *entry_ids)
+    pipe.execute()
+
+
+def _dead_letter_poison(redis_client, entries: list, failed_ids: list) -> int:
+    """Moves failed entries delivered FLUSH_MAX_DELIVERIES times or more to the DLQ."""
+    pipe = redis_client.pipeline(transaction=False)
+    for entry_id in failed_ids:
+        pipe.xpending_range(PROFILE_UPDATES_STREAM, PROFILE_WRITERS_GROUP, min=entry_id, max=entry_id, count=1)
+    deliveries = {
+        pending[0]["message_id"]: pending[0]["times_delivered"]
+        for pending in pipe.execute() if pending
+    }
+    poison = [entry_id for entry_id in failed_ids if deliveries.get(entry_id, 0) >= FLUSH_MAX_DELIVERIES]
+    if not poison:
+        return 0
+    data = dict(entries)
+    pipe = redis_client.pipeline(transaction=True)
+    for entry_id in poison:
+        pipe.xadd(PROFILE_UPDATES_DLQ, {**data[entry_id], "original_id": entry_id, "deliveries": deliveries[entry_id]})
+    pipe.xack(PROFILE_UPDATES_STREAM, PROFILE_WRITERS_GROUP, *poison)
+    pipe.xdel(PROFILE_UPDATES_STREAM, *poison)
+    pipe.execute()
+    print(f"--- [ScoreWriter] Moved {len(poison)} undeliverable updates to {PROFILE_UPDATES_DLQ} ---")
+    return len(poison)
+
+
+def _flush_batch(redis_client, entries: list) -> int:
+    """Writes one batch; acks what was written. Returns the number of entries acked."""
+    rows, history_rows, malformed = _coalesce(entries)
+    done = list(malformed)
+    failed = []
+
+    if rows:
+        with profiling.phase("supabase.profiles_select"):
+            existing = _existing_profiles(list(rows))
+        for user_id in set(rows) - existing:
+            print(f"--- [ScoreWriter] Dropping update for missing profile {user_id} ---")
+            done.extend(rows.pop(user_id)[1])
+        fields_by_user = {user_id: fields for user_id, (fields, _ids) in rows.items()}
+        if fields_by_user:
+            _apply_leaderboard(redis_client, fields_by_user)
+            with profiling.phase("supabase.profiles_update") as stats:
+                stats.add_bytes(len(json.dumps(fields_by_user)))
+                written = _update_profiles(fields_by_user)
+            for user_id, (_fields, entry_ids) in rows.items():
+                (done if user_id in written else failed).extend(entry_ids)
+    # Acked separately: a failing history write never holds back profile updates
+    _ack(redis_client, done)
+
+    history_done = []
+    if history_rows:
+        with profiling.phase("supabase.history_insert"):
+            written = {entry_id for _row, entry_id in _insert_history(history_rows)}
+        for _row, entry_id in history_rows:
+            (history_done if entry_id in written else failed).append(entry_id)
+        _ack(redis_client, history_done)
+
+    if failed:
+        _dead_letter_poison(redis_client, entries, failed)
+    print(f"--- [ScoreWriter] Flushed {len(done) + len(history_done)} updates "
+          f"({len(rows)} profiles, {len(history_done)} history rows, {len(failed)} failed) ---")
+    return len(done) + len(history_done)
+
+
+def flush_profile_updates() -> int:
+    """
+    Drains the buffer in batches. Returns the number of stream entries written.
+    Only one flusher runs at a time; concurrent callers return 0 immediately.
+    """
+    redis_client = get_redis()
+    lock = redis_client.lock(FLUSH_LOCK_KEY, timeout=120)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    flushed = 0
+    try:
+        _ensure_group(redis_client)
+        for _ in range(FLUSH_MAX_BATCHES):
+            entries = _read_batch(redis_client)
+            if not entries:
+                break
+
+            flushed += _flush_batch(redis_client, entries)
+            if len(entries) < FLUSH_BATCH_SIZE:
+                break
+    except Exception as e:
+        # e.g. Redis / Supabase unreachable: un-acked entries stay pending
+        # and are retried by a later flush.
+        print(f"--- [ScoreWriter] ERROR flushing profile updates: {e} ---")
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+    return flushed
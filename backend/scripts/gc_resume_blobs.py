@@ -0,0 +1,27 @@
+"""
+Prunes resume blobs (resumes/blobs/...) that nothing references any more.
+The worker runs the same collection daily (the `gc_resume_blobs` beat task);
+use this to preview it or to run it by hand.
+
+Run (from backend/):
+    python scripts/gc_resume_blobs.py --dry-run
+    python scripts/gc_resume_blobs.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blob_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete unreferenced resume blobs")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted")
+    args = parser.parse_args()
+    blob_store.collect_garbage(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
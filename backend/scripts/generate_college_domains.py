@@ -0,0 +1,73 @@
+"""
+Generates frontend/src/constants/collegeDomains.js from backend/data/colleges.json,
+so the frontend's pre-check and the API's verification use the same registry.
+
+Run (from backend/):
+    python scripts/generate_college_domains.py          # write the file
+    python scripts/generate_college_domains.py --check  # exit 1 if it is stale
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from college_registry import load_registry
+
+OUTPUT_PATH = os.path.join(BACKEND_DIR, "..", "frontend", "src", "constants", "collegeDomains.js")
+
+TEMPLATE = """// AUTO-GENERATED from backend/data/colleges.json by
+// backend/scripts/generate_college_domains.py. Do not edit by hand.
+
+export const COLLEGE_DOMAINS = {{
+{entries}
+}}
+
+// Matches a domain or any of its subdomains (e.g. cse.iitb.ac.in),
+// mirroring the backend's college registry.
+export const findCollegeByDomain = (domain) => {{
+  const labels = (domain || '').toLowerCase().split('.').filter(Boolean)
+  for (let i = 0; i < labels.length; i++) {{
+    const college = COLLEGE_DOMAINS[labels.slice(i).join('.')]
+    if (college) return college
+  }}
+  return null
+}}
+"""
+
+
+def _js_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def render() -> str:
+    registry = load_registry()
+    entries = "\n".join(
+        f"  {_js_string(domain)}: {_js_string(name)},"
+        for domain, name in registry.domains.items()
+    )
+    return TEMPLATE.format(entries=entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the frontend college domain table")
+    parser.add_argument("--check", action="store_true", help="Fail if the generated file is out of date")
+    args = parser.parse_args()
+
+    content = render()
+    if args.check:
+        with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+            if f.read() != content:
+                print("collegeDomains.js is out of date. Run: python scripts/generate_college_domains.py")
+                sys.exit(1)
+        print("collegeDomains.js is up to date.")
+        return
+
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        f.write(content)
+    print(f"Wrote {os.path.normpath(OUTPUT_PATH)}")
+
+
+if __name__ == "__main__":
+    main()
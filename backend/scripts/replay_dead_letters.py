@@ -0,0 +1,76 @@
+"""
+Lists and replays jobs parked in the `analysis_dlq` stream (see dead_letters.py).
+
+A replayed job re-sends the original task with its original arguments, plus
+the scores of the phases that already succeeded (the entry's `partial`, as
+the task's `reuse` kwarg), so those are not paid for again. This works the
+same for run_deep_analysis and for batch items, which have no score_history.
+
+Run (from backend/):
+    python scripts/replay_dead_letters.py --list
+    python scripts/replay_dead_letters.py --phase github.scrape --failure-class transient
+    python scripts/replay_dead_letters.py --id 1718000000000-0 --dry-run
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dead_letters
+from producer import get_celery_app
+from worker import RESUME_FIELDS, GITHUB_FIELDS
+
+
+def _reusable(partial: dict) -> dict:
+    """The finished branch scores of a parked job (what its retry would have carried)."""
+    return {name: value for name, value in partial.items() if name in RESUME_FIELDS + GITHUB_FIELDS}
+
+
+def _matches(entry: dict, args) -> bool:
+    if args.phase and args.phase not in entry["phases"].split(","):
+        return False
+    if args.failure_class and args.failure_class not in entry["failure_classes"].split(","):
+        return False
+    if args.task and entry["task"] != args.task:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List / replay dead-lettered analysis jobs")
+    parser.add_argument("--list", action="store_true", help="Only list matching entries")
+    parser.add_argument("--id", action="append", help="Replay only these entry ids")
+    parser.add_argument("--phase", help="e.g. gemini.resume, github.scrape, storage.download")
+    parser.add_argument("--failure-class", choices=sorted(dead_letters.RETRY_POLICY))
+    parser.add_argument("--task", help="e.g. run_deep_analysis, run_batch_item")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be replayed")
+    args = parser.parse_args()
+
+    entries = dead_letters.list_dead_letters(count=10000)
+    if args.id:
+        entries = [(entry_id, entry) for entry_id, entry in entries if entry_id in args.id]
+    entries = [(entry_id, entry) for entry_id, entry in entries if _matches(entry, args)][:args.limit]
+
+    replayed = 0
+    for entry_id, entry in entries:
+        failures = "; ".join(f"{f['phase']} [{f['failure_class']}]: {f['error']}" for f in entry["failures"])
+        kept = ", ".join(sorted(entry["partial"])) or "nothing"
+        print(f"  > {entry_id} {entry['task']}{tuple(entry['args'])} attempts={entry['attempts']} at {entry['failed_at']}")
+        print(f"      failed: {failures}")
+        print(f"      kept:   {kept}")
+        if args.list or args.dry_run:
+            continue
+        get_celery_app().send_task(entry["task"], args=entry["args"], kwargs={"reuse": _reusable(entry["partial"])})
+        dead_letters.remove_dead_letter(entry_id)
+        replayed += 1
+
+    if args.list or args.dry_run:
+        print(f"\n--- {len(entries)} matching dead-lettered jobs ---")
+    else:
+        print(f"\n--- Replayed {replayed} jobs ---")
+
+
+if __name__ == "__main__":
+    main()
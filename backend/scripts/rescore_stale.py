@@ -0,0 +1,67 @@
+"""
+Re-queues only the users whose latest resume or GitHub score was produced by
+an older rubric version or model (see score_history.py). Everyone else is
+left alone. In a re-queued job, any component that is still current is
+reused from score_history, so only the stale component calls the LLM again.
+The resume re-scored is the one the profile points at *now*
+(profiles.resume_blob_sha256), not the one the stale row was made from.
+
+Run (from backend/):
+    python scripts/rescore_stale.py --dry-run
+    python scripts/rescore_stale.py --limit 500
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blob_store
+import score_history
+from producer import send_deep_analysis
+from worker import GEMINI_MODEL, RESUME_RUBRIC_VERSION, GITHUB_RUBRIC_VERSION
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score profiles with stale rubric versions")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the stale users")
+    parser.add_argument("--limit", type=int, default=None, help="Max users to re-queue")
+    args = parser.parse_args()
+
+    current = {
+        "resume": (RESUME_RUBRIC_VERSION, GEMINI_MODEL),
+        "github": (GITHUB_RUBRIC_VERSION, GEMINI_MODEL),
+    }
+    print(f"--- Current rubrics: resume={RESUME_RUBRIC_VERSION}, github={GITHUB_RUBRIC_VERSION}, model={GEMINI_MODEL} ---")
+
+    targets = {}
+    for row in score_history.stale_rows(current):
+        target = targets.setdefault(row["user_id"], {"components": []})
+        target["components"].append(f"{row['component']} ({row['rubric_version']}, {row['model']})")
+        target.setdefault("github_username", row["github_username"])
+        target["resume_path"] = target.get("resume_path") or row["resume_path"]
+
+    # Current resume pointers; the recorded path is only a fallback for
+    # profiles from before content-addressed storage (migrations/002)
+    for user_id, resume_path in blob_store.current_resume_paths(list(targets)).items():
+        targets[user_id]["resume_path"] = resume_path
+
+    queued = skipped = 0
+    for user_id, target in targets.items():
+        if args.limit is not None and queued >= args.limit:
+            break
+        if not target["github_username"] or not target["resume_path"]:
+            print(f"  > SKIP {user_id}: no recorded inputs")
+            skipped += 1
+            continue
+        print(f"  > {user_id}: {', '.join(target['components'])}")
+        if not args.dry_run:
+            send_deep_analysis(user_id, target["github_username"], target["resume_path"])
+        queued += 1
+
+    action = "Would re-queue" if args.dry_run else "Re-queued"
+    print(f"\n--- {action} {queued} of {len(targets)} stale users ({skipped} skipped) ---")
+
+
+if __name__ == "__main__":
+    main()
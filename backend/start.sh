@@ -5,8 +5,17 @@ set -e
 
 # Start the Celery worker in the background
 # We use -P gevent for high-concurrency, non-blocking tasks
-echo "--- Starting Celery Worker (in background) ---"
-celery -A worker.celery_app worker --loglevel=info -P gevent &
+# -B runs the embedded beat scheduler (periodic flush of buffered score writes,
+# daily resume blob GC). Exactly ONE process may run beat: every extra one
+# fires the whole schedule again. When scaling out, set RUN_CELERY_BEAT=0 on
+# all instances but one (or on all, and run `celery -A worker.celery_app beat`
+# as its own single-instance service).
+BEAT_FLAG=""
+if [ "${RUN_CELERY_BEAT:-1}" = "1" ]; then
+    BEAT_FLAG="-B"
+fi
+echo "--- Starting Celery Worker (in background, beat: ${RUN_CELERY_BEAT:-1}) ---"
+celery -A worker.celery_app worker $BEAT_FLAG --loglevel=info -P gevent &
 
 # Start the Uvicorn API server in the foreground
 # This is what Render will monitor for "health"
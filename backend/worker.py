@@ -1,21 +1,29 @@
+from __future__ import annotations
+
 import os
 import json
+from typing import TYPE_CHECKING
 from celery import Celery
-from google import genai
-from google.genai import types
-from supabase import create_client, Client
+from celery.exceptions import Retry
+from celery.signals import worker_shutdown
 import httpx # We'll use the sync client here
-from dotenv import load_dotenv
 
 # --- 1. CONFIGURATION ---
-load_dotenv() # Loads the .env file
-
-REDIS_URL = os.environ.get("REDIS_URL")
-if REDIS_URL and REDIS_URL.startswith("rediss://"):
-    REDIS_URL = f"{REDIS_URL}?ssl_cert_reqs=none"
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") # This MUST be your Service Role Key
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# Env loading and client construction live in clients.py.
+# Supabase and Gemini are built on first use, not at import time.
+from clients import REDIS_URL, get_supabase, get_genai_client
+import profiling
+import batches
+import score_history
+import dead_letters
+import blob_store
+import features
+from dead_letters import AnalysisError, PERMANENT
+from score_writer import enqueue_profile_update, flush_profile_updates, FLUSH_INTERVAL_SECONDS
+
+if TYPE_CHECKING:
+    from google.genai import types
+
 LLM_PROVIDER = "gemini" # Our "pluggable" switch
 GITHUB_PAT = os.environ.get("GITHUB_PAT")
 
@@ -290,19 +298,41 @@ Finally, provide a short, actionable 2-3 bullet point 'Roadmap' of the *most cri
 
 """
 
-# --- 3. SETUP: CELERY, SUPABASE, GEMINI ---
+# --- 2.6. RUBRIC / MODEL VERSIONS (for score_history) ---
+# A rubric version changes whenever its prompt text changes, so editing a
+# prompt automatically marks every score made with the old text as stale.
+GEMINI_MODEL = "gemini-3-pro-preview"
+RESUME_RUBRIC_VERSION = score_history.rubric_version("MASTER_PROMPT_V5", MASTER_PROMPT_V5)
+GITHUB_RUBRIC_VERSION = score_history.rubric_version("MASTER_GITHUB_PROMPT_V2_2", MASTER_GITHUB_PROMPT_V2_2)
+
+# --- 3. SETUP: CELERY ---
+# Supabase and Gemini clients come from the lazy accessors in clients.py.
 celery_app = Celery("tasks", broker=REDIS_URL, backend=REDIS_URL)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-genai_client = genai.Client(api_key=GEMINI_API_KEY, http_options={"api_version": "v1alpha"})
+# Time-based flush of the profile write-behind buffer (see score_writer.py).
+# Runs on the embedded beat scheduler (`celery worker -B`, see start.sh);
+# only one process may run beat (RUN_CELERY_BEAT).
+celery_app.conf.beat_schedule = {
+    "flush-profile-updates": {
+        "task": "flush_profile_updates",
+        "schedule": FLUSH_INTERVAL_SECONDS,
+    },
+    # Prune resume blobs nobody references any more (see blob_store.py)
+    "gc-resume-blobs": {
+        "task": "gc_resume_blobs",
+        "schedule": 24 * 3600,
+    },
+}
 
 # --- 4. MODULAR LLM "ROUTER" (SYNC) ---
 
 def _build_text_content(text: str) -> types.Content:
+    from google.genai import types
     return types.Content(role="user", parts=[types.Part(text=text)])
 
 
 def _build_pdf_part(resume_bytes: bytes) -> types.Part:
+    from google.genai import types
     return types.Part(
         inline_data=types.Blob(mime_type="application/pdf", data=resume_bytes),
     )
@@ -311,6 +341,7 @@ def _build_pdf_part(resume_bytes: bytes) -> types.Part:
 def _build_generation_config(
     *, media_resolution: types.MediaResolution | None = None
 ) -> types.GenerateContentConfig:
+    from google.genai import types
     return types.GenerateContentConfig(
         response_mime_type="application/json",
         thinking_config=types.ThinkingConfig(
@@ -320,15 +351,31 @@ def _build_generation_config(
     )
 
 
+def _usage_from_response(response) -> dict:
+    """Token counts of one Gemini call (thinking tokens are billed as output)."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", None) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", None) or 0,
+        "thinking_tokens": getattr(usage, "thoughts_token_count", None) or 0,
+    }
+
+
 def _call_gemini_api_sync(*args) -> dict:
     """
     Private SYNC function to call the Gemini API.
     Overloaded behavior:
     - _call_gemini_api_sync(resume_bytes)
     - _call_gemini_api_sync(prompt_str, context_json_str)
+    Successful results carry the call's token counts under "usage".
+    Failures raise AnalysisError (phase "gemini.resume" / "gemini.github");
+    they are never turned into a score of 0.
     """
     print("--- [Worker] Calling Gemini API... ---")
+    phase = "gemini.resume" if len(args) == 1 else "gemini.github"
     try:
+        from google.genai import types
+        genai_client = get_genai_client()
         if len(args) == 1 and isinstance(args[0], (bytes, bytearray)):
             resume_bytes = args[0]
             resume_contents = [
@@ -336,7 +383,7 @@ def _call_gemini_api_sync(*args) -> dict:
                 types.Content(role="user", parts=[_build_pdf_part(resume_bytes)]),
             ]
             response = genai_client.models.generate_content(
-                model="gemini-3-pro-preview",
+                model=GEMINI_MODEL,
                 contents=resume_contents,
                 config=_build_generation_config(
                     media_resolution=types.MediaResolution.MEDIA_RESOLUTION_MEDIUM
@@ -345,7 +392,7 @@ def _call_gemini_api_sync(*args) -> dict:
         elif len(args) == 2 and all(isinstance(a, str) for a in args):
             prompt_str, context_json_str = args
             response = genai_client.models.generate_content(
-                model="gemini-3-pro-preview",
+                model=GEMINI_MODEL,
                 contents=[
                     _build_text_content(prompt_str),
                     _build_text_content(context_json_str),
@@ -353,11 +400,15 @@ def _call_gemini_api_sync(*args) -> dict:
                 config=_build_generation_config(),
             )
         else:
-            raise ValueError("Invalid arguments for _call_gemini_api_sync")
-        return json.loads(response.text)
+            raise AnalysisError(phase, PERMANENT, "Invalid arguments for _call_gemini_api_sync")
+        result = json.loads(response.text)
+        result["usage"] = _usage_from_response(response)
+        return result
     except Exception as e:
         print(f"--- [Worker] Gemini API ERROR: {e} ---")
-        return {"total_score_100": 0, "justification": f"Error: {e}", "actionable_feedback": "Unable to generate feedback due to an error."}
+        if isinstance(e, AnalysisError):
+            raise
+        raise AnalysisError(phase, dead_letters.classify(e), f"Gemini API error: {e}") from e
 
 
 def score_resume_with_llm_sync(resume_bytes: bytes) -> dict:
@@ -371,7 +422,7 @@ def score_resume_with_llm_sync(resume_bytes: bytes) -> dict:
     #   return _call_deepseek_api_sync(resume_bytes)
     else:
         print(f"--- [Worker] ERROR: Unknown LLM Provider '{LLM_PROVIDER}' ---")
-        return {"total_score_100": 0, "justification": "Error: Invalid LLM Provider", "actionable_feedback": "Unable to generate feedback due to configuration error."}
+        raise AnalysisError("gemini.resume", PERMANENT, f"Invalid LLM Provider '{LLM_PROVIDER}'")
 
 
 # --- 5. "DEEP TECH" GITHUB ENGINE (v4.2) ---
@@ -385,6 +436,16 @@ KEY_FILE_EXTENSIONS = [
     ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rs"
 ]
 
+def _github_request(client, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+    """
+    One GitHub call, profiled under "github.<endpoint>".
+    `client` is an httpx.Client, or the httpx module itself for raw downloads.
+    """
+    with profiling.phase(f"github.{endpoint}") as stats:
+        response = client.request(method, url, **kwargs)
+        stats.add_bytes(len(response.content))
+    return response
+
 def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
     """
     This is the "Hybrid Scraper" (v4.2).
@@ -400,9 +461,12 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
 
     # 1. Get User Profile
     user_url = f"https://api.github.com/users/{username}"
-    user_response = client.get(user_url)
+    user_response = _github_request(client, "GET", user_url, "user")
+    if user_response.status_code == 404:
+        raise AnalysisError("github.scrape", PERMANENT, f"GitHub user '{username}' not found.")
     if user_response.status_code != 200:
-        raise Exception(f"GitHub user '{username}' not found.")
+        # 403/429 here is almost always rate limiting, so worth a retry
+        raise AnalysisError("github.scrape", dead_letters.TRANSIENT, f"GitHub API returned {user_response.status_code} for user '{username}'.")
     
     user_data = user_response.json()
     context_packet["user_profile"] = {
@@ -416,7 +480,7 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
     
     # Path A: Try to get Pinned Repos first
     graphql_query = {"query": f'query {{ user(login: "{username}") {{ pinnedItems(first: 6, types: REPOSITORY) {{ nodes {{ ... on Repository {{ name, description, stargazerCount, forkCount, defaultBranchRef {{ name }} }} }} }} }} }}'}
-    gql_response = client.post("https://api.github.com/graphql", json=graphql_query)
+    gql_response = _github_request(client, "POST", "https://api.github.com/graphql", "graphql_pinned", json=graphql_query)
     
     if gql_response.status_code == 200:
         repo_nodes = gql_response.json().get("data", {}).get("user", {}).get("pinnedItems", {}).get("nodes", [])
@@ -432,7 +496,7 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
         print(f"--- [v4.2 Scraper] Path B: No pinned repos. Falling back to top 3 active repos. ---")
         context_packet["analysis_method"] = "top_repo_fallback"
         repo_url = f"https://api.github.com/users/{username}/repos?sort=pushed&per_page=3"
-        repo_response = client.get(repo_url)
+        repo_response = _github_request(client, "GET", repo_url, "repos_list")
         if repo_response.status_code == 200:
             top_repos = repo_response.json()
             # Need to re-fetch basic data we would have gotten from GraphQL
@@ -458,32 +522,32 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
 
         # Get README
         readme_content = ""
-        readme_res = client.get(f"{repo_url}/readme")
+        readme_res = _github_request(client, "GET", f"{repo_url}/readme", "readme")
         if readme_res.status_code == 200:
             readme_data = readme_res.json()
-            readme_content = httpx.get(readme_data.get("download_url")).text
+            readme_content = _github_request(httpx, "GET", readme_data.get("download_url"), "readme_raw").text
             if len(readme_content) > 1000:
                 readme_content = readme_content[:1000] + "... (truncated)"
 
         # Get File List (Tree)
         file_list = []
-        tree_res = client.get(f"{repo_url}/git/trees/{default_branch}?recursive=1")
+        tree_res = _github_request(client, "GET", f"{repo_url}/git/trees/{default_branch}?recursive=1", "tree")
         if tree_res.status_code == 200:
             tree_data = tree_res.json().get("tree", [])
             file_list = [item.get("path") for item in tree_data if item.get("type") == "blob"]
 
         # Get Commits
         commit_messages = []
-        commits_res = client.get(f"{repo_url}/commits?per_page=10")
+        commits_res = _github_request(client, "GET", f"{repo_url}/commits?per_page=10", "commits")
         if commits_res.status_code == 200:
             commit_messages = [c.get("commit", {}).get("message", "") for c in commits_res.json()]
 
         # Get Branch Count
-        branches_res = client.get(f"{repo_url}/branches")
+        branches_res = _github_request(client, "GET", f"{repo_url}/branches", "branches")
         branch_count = len(branches_res.json()) if branches_res.status_code == 200 else 1
 
         # Get PR Count
-        prs_res = client.get(f"{repo_url}/pulls?state=all")
+        prs_res = _github_request(client, "GET", f"{repo_url}/pulls?state=all", "pulls")
         pull_request_count = len(prs_res.json()) if prs_res.status_code == 200 else 0
 
         # "Key File" Heuristic & Raw Code Scrape
@@ -496,12 +560,12 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
         
         for file_path in key_files_found[:5]: # Max 5 key files
             print(f"--- [v4.2 Scraper] Fetching raw code for: {file_path} ---")
-            file_content_res = client.get(f"https://api.github.com/repos/{username}/{repo_name}/contents/{file_path}")
+            file_content_res = _github_request(client, "GET", f"https://api.github.com/repos/{username}/{repo_name}/contents/{file_path}", "contents")
             if file_content_res.status_code == 200:
                 file_data = file_content_res.json()
                 if file_data.get("encoding") == "base64" and file_data.get("content"):
                     # We can't send huge files. Truncate after decoding.
-                    raw_content = httpx.get(file_data.get("download_url")).text
+                    raw_content = _github_request(httpx, "GET", file_data.get("download_url"), "contents_raw").text
                     if len(raw_content) > 1500:
                         raw_content = raw_content[:1500] + "... (truncated)"
                     
@@ -526,82 +590,336 @@ def _get_github_context_packet(username: str, client: httpx.Client) -> dict:
 
     # 4. Fetch OSS Contributions
     contrib_url = f"https://api.github.com/search/issues?q=author:{username}+is:pr+is:merged+-user:{username}"
-    contrib_response = client.get(contrib_url)
+    contrib_response = _github_request(client, "GET", contrib_url, "search_prs")
     if contrib_response.status_code == 200:
         context_packet["oss_contributions_count"] = contrib_response.json().get("total_count", 0)
 
     print("--- [v4.2 Scraper] Context packet built. ---")
     return context_packet
 
-def get_github_score_v4_2_llm(username: str) -> dict:
+def get_github_score_v4_2_llm(username: str, user_id: str | None = None, resume_path: str | None = None,
+                              reused_score: dict | None = None) -> tuple[dict, dict]:
     """
     This is the "Brain Handoff" (v4.2).
     It calls the Scraper, then calls the LLM with the new v2.2 prompt.
+    With a `user_id`, an identical context packet already scored under the
+    current rubric is reused from score_history instead of re-calling the LLM.
+    `reused_score` (from an earlier attempt of the same job) skips the LLM
+    outright; the scrape still runs, for the context packet.
+    Returns (score data, the context packet it was scored from).
+    Raises AnalysisError ("github.scrape" or "gemini.github") on failure.
     """
+    # 1. Run the "Hybrid Scraper" to get the data
     try:
-        # 1. Run the "Hybrid Scraper" to get the data
         with httpx.Client(headers={"Authorization": f"token {GITHUB_PAT}"}, timeout=40.0) as client:
             context_packet = _get_github_context_packet(username, client)
-        
-        # 2. Feed the "Context Packet" to the LLM "Brain"
-        print(f"--- [v4.2 Engine] Sending {len(context_packet['analyzed_repos'])} repos to LLM for final scoring... ---")
-        score_data = _call_gemini_api_sync(MASTER_GITHUB_PROMPT_V2_2, json.dumps(context_packet))
-        
-        print(f"--- [v4.2 Engine] LLM GitHub Score: {score_data.get('total_score_100', 0)}/100 ---")
-        return score_data
-        
+    except AnalysisError as e:
+        print(f"--- [v4.2 Engine] CRITICAL ERROR --- {e}")
+        raise
     except Exception as e:
         print(f"--- [v4.2 Engine] CRITICAL ERROR --- {e}")
-        return {"total_score_100": 0, "justification": f"Error: {e}", "actionable_feedback": "Unable to generate feedback due to an error."}
+        raise AnalysisError("github.scrape", dead_letters.classify(e), f"GitHub scrape failed: {e}") from e
+    if reused_score:
+        return reused_score, context_packet
+    context_json = json.dumps(context_packet)
+    context_digest = score_history.input_hash(context_json)
+
+    cached = _lookup_history(user_id, "github", context_digest, GITHUB_RUBRIC_VERSION)
+    if cached:
+        return cached, context_packet
+    
+    # 2. Feed the "Context Packet" to the LLM "Brain"
+    print(f"--- [v4.2 Engine] Sending {len(context_packet['analyzed_repos'])} repos to LLM for final scoring... ---")
+    with profiling.phase("gemini.github") as stats:
+        stats.add_bytes(len(context_json))
+        score_data = _call_gemini_api_sync(MASTER_GITHUB_PROMPT_V2_2, context_json)
+    
+    print(f"--- [v4.2 Engine] LLM GitHub Score: {score_data.get('total_score_100', 0)}/100 ---")
+    _record_history(user_id, "github", context_digest, GITHUB_RUBRIC_VERSION, score_data, username, resume_path)
+    return score_data, context_packet
+
+
+# --- 5.5. SCORE HISTORY (REUSE + APPEND) ---
+def _lookup_history(user_id: str | None, component: str, input_digest: str, rubric: str) -> dict | None:
+    """A recorded score for this exact input/rubric/model, or None. Never raises."""
+    if not user_id:
+        return None
+    try:
+        with profiling.phase("supabase.history_lookup"):
+            cached = score_history.lookup(user_id, component, input_digest, rubric, GEMINI_MODEL)
+    except Exception as e:
+        print(f"--- [Worker] ERROR reading score history: {e} ---")
+        return None
+    if cached:
+        print(f"--- [Worker] Reusing {component} score from history ({rubric}) ---")
+    return cached
+
+
+def _record_history(user_id: str | None, component: str, input_digest: str, rubric: str,
+                    result: dict, github_username: str, resume_path: str | None):
+    """Appends a history row (only successful LLM calls get this far)."""
+    if not user_id:
+        return
+    try:
+        score_history.record(user_id, component, input_digest, rubric, GEMINI_MODEL, result, github_username, resume_path)
+    except Exception as e:
+        print(f"--- [Worker] ERROR recording score history: {e} ---")
 
 
 # --- 6. CELERY TASK: THE "BRAIN" ---
-@celery_app.task(name="run_deep_analysis")
-def run_deep_analysis(user_id: str, github_username: str, resume_path: str):
+# max_retries=None: how often a job is retried is decided per failure
+# class by dead_letters.RETRY_POLICY, not by Celery's default.
+@celery_app.task(name="run_deep_analysis", bind=True, max_retries=None)
+def run_deep_analysis(self, user_id: str, github_username: str, resume_path: str, reuse: dict | None = None):
     """
     This is the main "job" the worker runs.
     It is SYNCHRONOUS and will run to completion.
+    Every phase is timed; slow jobs are recorded (see profiling.py).
+    `reuse`: scores a previous attempt finished (set by retries and replays).
     """
-    print(f"--- [Worker] Job Started for user: {user_id} ---")
-    
-    # 1. Download Resume from Supabase Storage
-    print(f"--- [Worker] Downloading resume: {resume_path} ---")
+    job_id = self.request.id or f"local-{user_id}"
+    with profiling.profile_job(job_id, "run_deep_analysis", user_id=user_id, github_username=github_username):
+        _run_deep_analysis(self, user_id, github_username, resume_path, reuse)
+
+
+def _download_resume(resume_path: str) -> bytes:
     try:
         # The supabase-python client storage download is synchronous
-        resume_bytes = supabase.storage.from_("resumes").download(resume_path)
+        with profiling.phase("storage.download") as stats:
+            resume_bytes = get_supabase().storage.from_("resumes").download(resume_path)
+            stats.add_bytes(len(resume_bytes))
     except Exception as e:
         print(f"--- [Worker] ERROR downloading file: {e} ---")
-        return # Job fails
-    
-    # 2. Score Resume with our "Pluggable" LLM (Gemini)
-    resume_score_data = score_resume_with_llm_sync(resume_bytes)
-    resume_score = resume_score_data.get("total_score_100", 0)
-    resume_justification = resume_score_data.get("justification", "Analysis complete.") # Get the justification
-    resume_feedback = resume_score_data.get("actionable_feedback", "No feedback available.") # Get the roadmap
-    
+        # storage3 reports a missing object as a 404 / "not_found" error body
+        missing = "not_found" in str(e).lower() or "404" in str(e)
+        failure_class = PERMANENT if missing else dead_letters.classify(e)
+        raise AnalysisError("storage.download", failure_class, f"Error downloading {resume_path}: {e}") from e
+    return resume_bytes
+
+
+RESUME_FIELDS = ("resume_score", "resume_justification", "resume_feedback")
+GITHUB_FIELDS = ("github_score", "github_justification", "github_feedback")
+
+
+def _score_candidate(resume_path: str, github_username: str, user_id: str | None = None,
+                     reuse: dict | None = None) -> tuple[dict, list]:
+    """
+    Scores one candidate (resume + GitHub). Shared by the single-user job
+    and recruiter batch items. `reuse` holds the fields of branches an
+    earlier attempt of the same job finished, which are not redone (the
+    GitHub scrape still runs when match features need its packet). With a
+    `user_id`, scores are also reused from / appended to score_history.
+    Returns (profile fields of every branch that succeeded, [AnalysisError]).
+    showoff_score (and, with a `user_id`, match_features) is only included
+    when both branches succeeded.
+    """
+    fields = {}
+    failures = []
+    context_packet = None
+    reuse = reuse or {}
+
+    # 1-2. Download + score Resume with our "Pluggable" LLM (Gemini)
+    # A blob path already carries the content hash, so a resume scored before
+    # is reused from history without downloading it at all.
+    if "resume_score" in reuse:
+        fields.update({name: reuse.get(name) for name in RESUME_FIELDS})
+    else:
+        try:
+            resume_digest = blob_store.sha_from_path(resume_path)
+            resume_score_data = resume_digest and _lookup_history(user_id, "resume", resume_digest, RESUME_RUBRIC_VERSION)
+            if not resume_score_data:
+                print(f"--- [Worker] Downloading resume: {resume_path} ---")
+                resume_bytes = _download_resume(resume_path)
+                if not resume_digest: # Legacy `{user_id}/{filename}` path
+                    resume_digest = score_history.input_hash(resume_bytes)
+                    resume_score_data = _lookup_history(user_id, "resume", resume_digest, RESUME_RUBRIC_VERSION)
+            if not resume_score_data:
+                with profiling.phase("gemini.resume") as stats:
+                    stats.add_bytes(len(resume_bytes))
+                    resume_score_data = score_resume_with_llm_sync(resume_bytes)
+                _record_history(user_id, "resume", resume_digest, RESUME_RUBRIC_VERSION, resume_score_data, github_username, resume_path)
+            fields["resume_score"] = resume_score_data.get("total_score_100", 0)
+            fields["resume_justification"] = resume_score_data.get("justification", "Analysis complete.") # Get the justification
+            fields["resume_feedback"] = resume_score_data.get("actionable_feedback", "No feedback available.") # Get the roadmap
+        except AnalysisError as e:
+            failures.append(e)
+
     # 3. Score GitHub with NEW "Deep Tech Engine" (v4.2)
-    github_score_data = get_github_score_v4_2_llm(github_username)
-    github_score = github_score_data.get("total_score_100", 0)
-    github_justification = github_score_data.get("justification", "Analysis complete.")
-    github_feedback = github_score_data.get("actionable_feedback", "No feedback available.") # Get the roadmap
-    
+    if "github_score" in reuse and not user_id:
+        fields.update({name: reuse.get(name) for name in GITHUB_FIELDS})
+    else:
+        try:
+            github_score_data, context_packet = get_github_score_v4_2_llm(
+                github_username, user_id, resume_path, _reused_score(reuse, "github")
+            )
+            fields["github_score"] = github_score_data.get("total_score_100", 0)
+            fields["github_justification"] = github_score_data.get("justification", "Analysis complete.")
+            fields["github_feedback"] = github_score_data.get("actionable_feedback", "No feedback available.") # Get the roadmap
+        except AnalysisError as e:
+            failures.append(e)
+
     # 4. Calculate Final Score (NEW 70/30 WEIGHTING)
-    showoff_score = (resume_score * 0.7) + (github_score * 0.3)
+    if not failures:
+        fields["showoff_score"] = (fields["resume_score"] * 0.7) + (fields["github_score"] * 0.3)
+        # 4.5. Compact features for recruiter job matching (see features.py)
+        if user_id:
+            fields["match_features"] = features.extract_features(fields, context_packet)
+
+    return fields, failures
+
+
+def _reused_score(reuse: dict, component: str) -> dict | None:
+    """A reused branch's fields back in the LLM's shape, or None."""
+    if f"{component}_score" not in reuse:
+        return None
+    return {
+        "total_score_100": reuse[f"{component}_score"],
+        "justification": reuse.get(f"{component}_justification"),
+        "actionable_feedback": reuse.get(f"{component}_feedback"),
+    }
+
+
+def _retry_or_dead_letter(task, args: list, failures: list, partial: dict):
+    """
+    Retries the whole job if any failed phase's policy allows another attempt,
+    passing the branches that succeeded along (the `reuse` kwarg) so they are
+    not paid for again; otherwise parks the job in the dead-letter stream,
+    where `partial` is kept for a replay.
+    """
+    countdown = dead_letters.retry_countdown(failures, task.request.retries)
+    if countdown is not None:
+        print(f"--- [Worker] Retrying {task.name} in {countdown}s ({', '.join(f.phase for f in failures)}) ---")
+        reuse = {name: value for name, value in partial.items() if name in RESUME_FIELDS + GITHUB_FIELDS}
+        raise task.retry(countdown=countdown, kwargs={"reuse": reuse})
+    dead_letters.dead_letter(task.name, args, failures, task.request.retries + 1, partial)
+
+
+def _failure_message(failures: list) -> str:
+    """What the candidate is told when their analysis was given up on."""
+    messages = []
+    for failure in failures:
+        if failure.phase == "github.scrape" and failure.failure_class == PERMANENT:
+            messages.append(str(failure)) # e.g. "GitHub user 'x' not found."
+        elif failure.phase in ("storage.download", "gemini.resume"):
+            messages.append("We couldn't analyze your resume. Please upload it again.")
+        elif failure.phase.startswith(("github.", "gemini.github")):
+            messages.append("We couldn't analyze your GitHub profile. Please try again later.")
+        else:
+            messages.append("We couldn't save your results. Please try again later.")
+    return " ".join(dict.fromkeys(messages))
+
+
+def _run_deep_analysis(task, user_id: str, github_username: str, resume_path: str, reuse: dict | None):
+    print(f"--- [Worker] Job Started for user: {user_id} ---")
+    args = [user_id, github_username, resume_path]
+    
+    # 1-4. Download + score resume, score GitHub
+    fields, failures = _score_candidate(resume_path, github_username, user_id, reuse)
+    if not failures:
+        fields["analysis_status"] = "complete"
+        fields["analysis_error"] = None
     
-    # 5. Save *ALL* scores to Supabase
-    print(f"--- [Worker] Saving scores for {user_id}: R={resume_score}, G={github_score}, Total={showoff_score} ---")
+    # 5. Save every score we *did* get to Supabase (via the write-behind buffer),
+    # so e.g. a GitHub failure never throws away a finished resume score.
+    # `rank` is filled in from the leaderboard when the buffer is flushed.
+    if fields:
+        print(f"--- [Worker] Saving scores for {user_id}: R={fields.get('resume_score')}, G={fields.get('github_score')}, Total={fields.get('showoff_score')} ---")
+        try:
+            # Buffered: the Supabase write itself is timed in the flush (supabase.* phases)
+            with profiling.phase("buffer.enqueue"):
+                enqueue_profile_update(user_id, fields)
+        except Exception as e:
+            print(f"--- [Worker] ERROR buffering scores: {e} ---")
+            failures.append(AnalysisError("buffer.enqueue", dead_letters.TRANSIENT, f"Error saving scores: {e}"))
+
+    if failures:
+        _retry_or_dead_letter(task, args, failures, fields) # Raises Retry if it retries
+        # Dead-lettered: tell the candidate (the processing page stops waiting)
+        try:
+            enqueue_profile_update(user_id, {"analysis_status": "failed", "analysis_error": _failure_message(failures)})
+        except Exception as e:
+            print(f"--- [Worker] ERROR saving failure status: {e} ---")
+        return
+
+    # 6. Tell the API processes' match indexes (they reload from `profiles` otherwise)
+    if "match_features" in fields:
+        try:
+            features.publish_features(user_id, fields["match_features"])
+        except Exception as e:
+            print(f"--- [Worker] ERROR publishing match features: {e} ---")
+    print(f"--- [Worker] Job COMPLETE for user: {user_id} ---")
+
+
+# --- 6.5. CELERY TASKS: RECRUITER BATCHES ---
+# Queued by producer.send_batch() as a sliding window. run_batch_item must
+# not fail (its slot would never start the next item): it retries per
+# RETRY_POLICY, then records the item as failed and dead-letters it.
+# Either way it then hands its slot to the next queued item.
+@celery_app.task(name="run_batch_item", bind=True, max_retries=None)
+def run_batch_item(self, batch_id: str, item_id: str, github_username: str, resume_path: str,
+                   reuse: dict | None = None):
+    job_id = self.request.id or f"local-{batch_id}-{item_id}"
+    with profiling.profile_job(job_id, "run_batch_item", batch_id=batch_id, github_username=github_username):
+        fields, failures = _score_candidate(resume_path, github_username, reuse=reuse)
+
+    if failures:
+        print(f"--- [Worker] ERROR in batch {batch_id} item {item_id}: {'; '.join(str(f) for f in failures)} ---")
+        try:
+            _retry_or_dead_letter(self, [batch_id, item_id, github_username, resume_path], failures, fields)
+        except Retry:
+            raise
+        except Exception as e:
+            print(f"--- [Worker] ERROR dead-lettering batch item: {e} ---")
+        result = {"status": "failed", "error": "; ".join(str(f) for f in failures), **fields}
+    else:
+        result = {"status": "done", **fields}
+
     try:
-        supabase.from_("profiles").update({
-            "resume_score": resume_score,
-            "github_score": github_score,
-            "showoff_score": showoff_score,
-            "resume_justification": resume_justification,
-            "github_justification": github_justification,
-            "resume_feedback": resume_feedback,
-            "github_feedback": github_feedback,
-            "rank": 0 # We'll calculate rank later
-        }).eq("user_id", user_id).execute()
-        
-        print(f"--- [Worker] Job COMPLETE for user: {user_id} ---")
+        batches.record_result(batch_id, item_id, result)
     except Exception as e:
-        print(f"--- [Worker] ERROR saving to Supabase: {e} ---")
\ No newline at end of file
+        print(f"--- [Worker] ERROR recording batch result: {e} ---")
+    _advance_batch(batch_id)
+    return result["status"]
+
+
+def _advance_batch(batch_id: str):
+    """Starts the next queued item in this item's slot, or finalizes the batch after the last one."""
+    try:
+        for item_id, github_username, resume_path in batches.pop_next(batch_id):
+            run_batch_item.apply_async(args=[batch_id, item_id, github_username, resume_path])
+        if batches.claim_finalize(batch_id):
+            finalize_batch.delay(batch_id)
+    except Exception as e:
+        print(f"--- [Worker] ERROR advancing batch {batch_id}: {e} ---")
+
+
+@celery_app.task(name="finalize_batch")
+def finalize_batch(batch_id: str):
+    batches.mark_complete(batch_id)
+    print(f"--- [Worker] Batch COMPLETE: {batch_id} ---")
+
+
+# --- 7. CELERY TASK: FLUSH THE PROFILE WRITE BUFFER ---
+@celery_app.task(name="flush_profile_updates", bind=True, ignore_result=True)
+def flush_profile_updates_task(self):
+    """
+    Periodic (beat) flush of buffered score updates, profiled like a job so
+    its Supabase writes are timed. Size-based flushes happen inline in
+    enqueue_profile_update (and are timed as part of the job that ran them).
+    """
+    job_id = self.request.id or "local-flush"
+    with profiling.profile_job(job_id, "flush_profile_updates"):
+        return flush_profile_updates()
+
+
+# --- 7.5. CELERY TASK: RESUME BLOB GARBAGE COLLECTION ---
+@celery_app.task(name="gc_resume_blobs", ignore_result=True)
+def gc_resume_blobs_task(dry_run: bool = False):
+    """Daily (beat): deletes resume blobs no profile, score, batch or DLQ entry references."""
+    return blob_store.collect_garbage(dry_run=dry_run)
+
+
+@worker_shutdown.connect
+def _flush_on_shutdown(**kwargs):
+    # Best effort: whatever is left stays in the stream for the next worker.
+    flush_profile_updates()
\ No newline at end of file
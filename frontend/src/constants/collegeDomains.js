@@ -1,3 +1,6 @@
+// AUTO-GENERATED from backend/data/colleges.json by
+// backend/scripts/generate_college_domains.py. Do not edit by hand.
+
 export const COLLEGE_DOMAINS = {
   'iitb.ac.in': 'IIT Bombay',
   'iitd.ac.in': 'IIT Delhi',
@@ -14,3 +17,13 @@ export const COLLEGE_DOMAINS = {
   'nitc.ac.in': 'NIT Calicut',
 }
 
+// Matches a domain or any of its subdomains (e.g. cse.iitb.ac.in),
+// mirroring the backend's college registry.
+export const findCollegeByDomain = (domain) => {
+  const labels = (domain || '').toLowerCase().split('.').filter(Boolean)
+  for (let i = 0; i < labels.length; i++) {
+    const college = COLLEGE_DOMAINS[labels.slice(i).join('.')]
+    if (college) return college
+  }
+  return null
+}
@@ -327,7 +327,20 @@ export default function DashboardPage() {
   }
 
   // === Leaderboard Stats ===
+  // Rank comes from the API's leaderboard (profiles.rank is not kept current)
   const fetchLeaderboardStats = async (session) => {
+    try {
+      const apiBaseUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
+      const response = await fetch(`${apiBaseUrl}/leaderboard/rank/${session.user.id}`)
+      if (!response.ok) throw new Error(`Leaderboard API returned ${response.status}`)
+      const { rank, total } = await response.json()
+      setTotalDevelopers(total)
+      setProfile(prev => ({ ...prev, rank: rank || 0 }))
+      return
+    } catch (error) {
+      console.error('Error fetching rank from API, counting profiles instead:', error)
+    }
+
     try {
       const { data: allProfiles, error } = await supabase
         .from('profiles')
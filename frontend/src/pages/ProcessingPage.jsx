@@ -2,7 +2,7 @@ import { useState, useEffect, useRef } from 'react'
 import { supabase } from '../supabaseClient'
 import { useNavigate } from 'react-router-dom'
 import { motion } from 'framer-motion'
-import { Check, Clock, LogOut } from 'lucide-react'
+import { AlertTriangle, Check, Clock, LogOut } from 'lucide-react'
 import mixpanel from 'mixpanel-browser'
 
 // --- Re-usable Loading Spinner ---
@@ -89,9 +89,38 @@ const ActiveAnalysisState = ({ userName }) => {
     )
 }
 
+// --- Failed Analysis State Component ---
+const FailedAnalysisState = ({ message, onRetry }) => (
+    <motion.div
+        initial={{ opacity: 0, y: -20 }}
+        animate={{ opacity: 1, y: 0 }}
+        transition={{ duration: 0.5 }}
+        className="w-full max-w-xs sm:max-w-md md:max-w-lg mx-auto p-4 sm:p-6 md:p-8 space-y-4 sm:space-y-6
+           rounded-2xl border border-white/10 
+           bg-white/5 backdrop-blur-lg shadow-2xl mt-16 sm:mt-0 text-center"
+    >
+        <AlertTriangle className="h-10 w-10 text-accent-primary mx-auto" />
+        <h1 className="text-xl sm:text-2xl md:text-3xl font-bold text-text-primary">
+            We Couldn't Finish Your Analysis
+        </h1>
+        <p className="text-sm sm:text-base text-text-muted">
+            {message || "Something went wrong while analyzing your profile. Please try again."}
+        </p>
+        <motion.button
+            onClick={onRetry}
+            whileHover={{ scale: 1.05 }}
+            whileTap={{ scale: 0.95 }}
+            className="px-6 py-3 rounded-lg font-semibold text-white bg-accent-primary hover:opacity-90 transition-opacity"
+        >
+            Try Again
+        </motion.button>
+    </motion.div>
+)
+
 export default function ProcessingPage() {
     const [session, setSession] = useState(null)
     const [loading, setLoading] = useState(true)
+    const [failure, setFailure] = useState(null) // analysis_error once the worker gives up
     const navigate = useNavigate()
     const pollIntervalRef = useRef(null)
     const isMountedRef = useRef(true) // Track if component is mounted
@@ -152,7 +181,7 @@ export default function ProcessingPage() {
             try {
                 const { data: profile, error } = await supabase
                     .from('profiles')
-                    .select('resume_score, github_score, showoff_score')
+                    .select('resume_score, github_score, showoff_score, analysis_status, analysis_error')
                     .eq('user_id', userId)
                     .single()
 
@@ -162,7 +191,16 @@ export default function ProcessingPage() {
                 }
 
                 if (profile) {
-                    if (profile.resume_score !== null && profile.github_score !== null) {
+                    if (profile.analysis_status === 'failed') {
+                        console.log('[Processing] Analysis failed, stopping polling')
+                        clearInterval(pollIntervalRef.current)
+                        pollIntervalRef.current = null
+                        if (isMountedRef.current) {
+                            setFailure(profile.analysis_error || '')
+                        }
+                    } else if (profile.analysis_status === 'processing') {
+                        console.log('[Processing] Analysis still running')
+                    } else if (profile.resume_score !== null && profile.github_score !== null) {
                         console.log('[Processing] Scores detected, navigating to /profile')
                         clearInterval(pollIntervalRef.current)
                         pollIntervalRef.current = null
@@ -205,7 +243,9 @@ export default function ProcessingPage() {
                 <LogOut size={16} />
                 Sign Out
             </motion.button>
-            <ActiveAnalysisState userName={userName} />
+            {failure !== null
+                ? <FailedAnalysisState message={failure} onRetry={() => navigate('/upload')} />
+                : <ActiveAnalysisState userName={userName} />}
         </div>
     )
 }
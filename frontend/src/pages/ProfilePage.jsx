@@ -5,7 +5,7 @@ import { useOutletContext, useNavigate } from 'react-router-dom'
 import { Github, ExternalLink, FileText, GraduationCap, ChevronDown, BadgeCheck, RefreshCw } from 'lucide-react'
 import ScoreCircle from '../components/ScoreCircle'
 import { generateAvatarUrl } from '../utils/avatarUtils'
-import { COLLEGE_DOMAINS } from '../constants/collegeDomains'
+import { findCollegeByDomain } from '../constants/collegeDomains'
 
 // Re-usable Feedback Renderer
 const FeedbackRenderer = ({ feedback }) => {
@@ -118,7 +118,7 @@ const ProfilePage = () => {
       return
     }
     const domain = collegeEmail.split('@')[1]?.toLowerCase()
-    if (!domain || !COLLEGE_DOMAINS[domain]) {
+    if (!domain || !findCollegeByDomain(domain)) {
       setVerificationError('Sorry, this college is not yet supported.')
       return
     }
@@ -133,7 +133,7 @@ const ProfilePage = () => {
       if (!response.ok) {
         throw new Error(data.detail || 'Failed to send OTP. Please try again.')
       }
-      setPendingCollegeName(data.college_name || COLLEGE_DOMAINS[domain])
+      setPendingCollegeName(data.college_name || findCollegeByDomain(domain))
       setVerificationStage('otp')
       setVerificationError('')
     } catch (error) {
@@ -94,7 +94,7 @@ print_message "📦 Starting Backend Services..." "$BLUE"
 # Start Celery Worker
 cd backend
 print_message "Starting Celery worker..." "$BLUE"
-celery -A worker.celery_app worker --loglevel=info -P gevent > ../celery.log 2>&1 &
+celery -A worker.celery_app worker -B --loglevel=info -P gevent > ../celery.log 2>&1 &
 CELERY_PID=$!
 print_message "✓ Celery worker started (PID: $CELERY_PID)" "$GREEN"
 sleep 2